@@ -2,15 +2,35 @@
 College Portal - Main Flask Application
 Functional backend with SQLite database and WhatsApp integration
 """
-from flask import Flask, request, jsonify, render_template, send_from_directory, session, make_response
+from flask import Flask, Response, request, jsonify, render_template, send_from_directory, session, make_response, stream_with_context
 from flask_cors import CORS
+from werkzeug.middleware.proxy_fix import ProxyFix
 from datetime import datetime, timedelta
 import os
-import hashlib
+import re
+import threading
+import click
+from sqlalchemy.orm import configure_mappers
 
 # Import local modules
 from config import config
-from models import db, Student, OutingRequest, XeroxOrder, MessOrder, FivestarOrder, CCDOrder, StationaryOrder, RequestStatus
+from archive import OrderArchive, archive_orders, find_archived, page_orders
+from audit import AuditLog, status_row
+from cache import make_cache
+from counters import order_created, orders_created, status_changed, student_created, read_counters, reconcile_counters
+from export import FORMATS, InvalidExportFilter, export_columns, export_query, parse_day, stream_rows
+from importer import StudentImporter, detect_format, read_rows
+from events import emit, emit_many, latest_event_id, stream_events, prune_events
+from migrations import ensure_schema
+from notifications import NotificationWorker, make_transport, enqueue, deliver_due
+from versions import bump_versions, order_changed, order_list_scopes, conditional
+from passwords import HasherPool, PoolSaturated, make_hasher
+from sqlite_profile import configure as configure_sqlite
+from serializers import compile_serializers, list_query, paginate_rows, json_response
+from throttle import RateLimiter
+from pagination import InvalidCursor
+from models import db, Student, Order, ArchivedOrder, RequestStatus, WhatsAppMessage
+from services import SERVICES, SERVICES_BY_PATH
 
 def create_app(config_name='development'):
     """Application factory"""
@@ -23,15 +43,55 @@ def create_app(config_name='development'):
     app.config['SESSION_COOKIE_HTTPONLY'] = True
     app.config['SESSION_COOKIE_SECURE'] = False  # Set to True in production with HTTPS
     
+    # Behind a reverse proxy, take the client address from the hops we trust
+    # (request.remote_addr keys the login rate limit)
+    hops = app.config['PROXY_FIX_HOPS']
+    if hops:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=hops, x_proto=hops, x_host=hops)
+    
     # Enable CORS
     CORS(app, supports_credentials=True, origins=['http://localhost:5001', 'http://127.0.0.1:5001'])
     
     # Initialize database
     db.init_app(app)
+    configure_sqlite(app, db)
     
-    # Create tables
+    # Create tables and bring existing databases up to date; skipped when the
+    # stored schema fingerprint already matches these models
     with app.app_context():
-        db.create_all()
+        ensure_schema(db.engine)
+    compile_serializers([Student, RequestStatus, Order])
+    
+    # Status history rows, written inline or through a write-behind buffer
+    app.audit_log = AuditLog(app, app.config['AUDIT_LOG_MODE'],
+                             app.config['AUDIT_BATCH_SIZE'], app.config['AUDIT_FLUSH_INTERVAL'])
+    
+    # Finished orders moved out of the hot tables by `flask archive-orders`
+    app.order_archive = OrderArchive(app.config['ARCHIVE_DIR'])
+    
+    # WhatsApp delivery runs in the background, off the request path
+    app.whatsapp_transport = make_transport(app.config)
+    app.notification_worker = None
+    
+    def start_background():
+        """Start this process's audit-log flusher and WhatsApp worker threads"""
+        app.audit_log.start()
+        if app.config['NOTIFICATION_WORKER'] and app.notification_worker is None:
+            app.notification_worker = NotificationWorker(app, app.whatsapp_transport)
+            app.notification_worker.start()
+    
+    # Called by the server in each process that serves requests (post_fork in
+    # gunicorn.conf.py, __main__ below), never for CLI commands: a short-lived
+    # command would claim outbox rows and exit mid-send
+    app.start_background = start_background
+    if app.config['BACKGROUND_THREADS']:
+        start_background()
+    
+    @app.cli.command('db-upgrade')
+    def db_upgrade():
+        """Apply pending schema migrations"""
+        applied = ensure_schema(db.engine, force=True)
+        print(f"Applied migrations: {applied}" if applied else "Database is up to date")
     
     # Health check
     @app.route('/api/health', methods=['GET'])
@@ -40,9 +100,33 @@ def create_app(config_name='development'):
     
     # ==================== AUTHENTICATION ROUTES ====================
     
+    # Password hashing runs on a bounded pool; a full queue answers 503
+    app.password_pool = HasherPool(make_hasher(app.config),
+                                   app.config['PASSWORD_HASH_WORKERS'],
+                                   app.config['PASSWORD_HASH_QUEUE'])
+    
     def hash_password(password):
-        """Hash password using SHA-256"""
-        return hashlib.sha256(password.encode()).hexdigest()
+        """Hash password with the configured KDF"""
+        return app.password_pool.hash(password)
+    
+    @app.errorhandler(PoolSaturated)
+    def hasher_saturated(error):
+        response = jsonify({'error': str(error)})
+        response.headers['Retry-After'] = '1'
+        return response, 503
+    
+    login_id_limiter = RateLimiter(app.config['LOGIN_ID_BURST'], app.config['LOGIN_ID_PER_MINUTE'])
+    login_ip_limiter = RateLimiter(app.config['LOGIN_IP_BURST'], app.config['LOGIN_IP_PER_MINUTE'])
+    phone_pattern = re.compile(r'^\+?\d{10,15}$')
+    
+    def find_student_for_login(login_id):
+        """Look a student up by phone or student ID, each through its own index"""
+        if phone_pattern.match(login_id):
+            student = Student.query.filter_by(phone=login_id).first()
+            if student:
+                return student
+        # Student IDs can be all digits too, so fall back for phone-shaped input
+        return Student.query.filter_by(student_id=login_id).first()
     
     @app.route('/api/login', methods=['POST'])
     def login():
@@ -54,19 +138,35 @@ def create_app(config_name='development'):
         
         if not login_id or not password:
             return jsonify({'error': 'Login ID and password are required'}), 400
+        if not isinstance(login_id, str) or not isinstance(password, str):
+            return jsonify({'error': 'Login ID and password must be strings'}), 400
         
-        # Find student by ID or phone
-        student = Student.query.filter(
-            (Student.student_id == login_id) | (Student.phone == login_id)
-        ).first()
+        # Reject bursts before they reach the database or the hasher
+        login_id = login_id.strip()
+        wait = max(login_ip_limiter.allow(request.remote_addr or ''),
+                   login_id_limiter.allow(login_id.lower()))
+        if wait:
+            response = jsonify({'error': 'Too many login attempts, please try again later'})
+            response.headers['Retry-After'] = str(int(wait) + 1)
+            return response, 429
+        
+        student = find_student_for_login(login_id)
         
         if not student:
+            # Do the same KDF work as a wrong password, so the response time
+            # doesn't tell which login IDs exist
+            app.password_pool.verify(password, app.password_pool.dummy_hash)
             return jsonify({'error': 'Invalid credentials'}), 401
         
         # Verify password
-        if student.password != hash_password(password):
+        if not app.password_pool.verify(password, student.password):
             return jsonify({'error': 'Invalid credentials'}), 401
         
+        # Upgrade legacy SHA-256 or lower-cost hashes now that we know the password
+        if app.password_pool.needs_rehash(student.password):
+            student.password = hash_password(password)
+            db.session.commit()
+        
         # Create session
         session['student_id'] = student.id
         session['student_name'] = student.name
@@ -124,7 +224,10 @@ def create_app(config_name='development'):
         )
         
         db.session.add(student)
+        student_created()
+        bump_versions('students')
         db.session.commit()
+        app.student_cache.delete(student.id)
         
         return jsonify({
             'message': 'Account created successfully',
@@ -145,6 +248,38 @@ def create_app(config_name='development'):
         session.clear()
         return jsonify({'message': 'Logged out successfully'})
     
+    # ==================== STUDENT PROFILE CACHE ====================
+    
+    app.student_cache = make_cache(app.config, 'student_profiles',
+                                   app.config['STUDENT_CACHE_SIZE'], app.config['STUDENT_CACHE_TTL'])
+    
+    def get_student_profile(student_id):
+        """Cached public profile of a student by primary key, or None"""
+        try:
+            student_id = int(student_id)
+        except (TypeError, ValueError):
+            return None
+        profile = app.student_cache.get(student_id)
+        if profile is None:
+            student = Student.query.get(student_id)
+            if not student:
+                return None
+            profile = {
+                'id': student.id,
+                'student_id': student.student_id,
+                'name': student.name,
+                'email': student.email,
+                'phone': student.phone,
+                'hostel_room': student.hostel_room,
+                'blood_group': student.blood_group
+            }
+            app.student_cache.set(student_id, profile)
+        return profile
+    
+    @app.route('/api/cache/stats', methods=['GET'])
+    def get_cache_stats():
+        return jsonify({'student_profiles': app.student_cache.stats()})
+    
     @app.route('/api/me', methods=['GET'])
     def get_current_user():
         """Get current logged in user"""
@@ -152,26 +287,15 @@ def create_app(config_name='development'):
         if not student_id:
             return jsonify({'error': 'Not authenticated'}), 401
         
-        student = Student.query.get(student_id)
-        if not student:
+        profile = get_student_profile(student_id)
+        if not profile:
             return jsonify({'error': 'User not found'}), 404
         
-        return jsonify({
-            'id': student.id,
-            'student_id': student.student_id,
-            'name': student.name,
-            'email': student.email,
-            'phone': student.phone,
-            'hostel_room': student.hostel_room,
-            'blood_group': student.blood_group
-        })
+        return jsonify(profile)
     
     @app.route('/api/demo-login', methods=['POST'])
     def demo_login():
         """Login with demo account"""
-        # Ensure tables exist
-        db.create_all()
-        
         # Find or create demo student
         demo = Student.query.filter_by(student_id='21CS001').first()
         
@@ -188,6 +312,8 @@ def create_app(config_name='development'):
                 blood_group='O+'
             )
             db.session.add(demo)
+            student_created()
+            bump_versions('students')
             db.session.commit()
         
         # Create session
@@ -210,9 +336,10 @@ def create_app(config_name='development'):
     # ==================== STUDENT ROUTES ====================
     
     @app.route('/api/students', methods=['GET'])
+    @conditional(lambda: ['students'])
     def get_students():
-        students = Student.query.all()
-        return jsonify({'students': [s.to_dict() for s in students]})
+        students, next_cursor = paginate_rows(list_query(Student), Student)
+        return json_response({'students': students, 'next_cursor': next_cursor})
     
     @app.route('/api/students/<int:student_id>', methods=['GET'])
     def get_student(student_id):
@@ -239,7 +366,10 @@ def create_app(config_name='development'):
         )
         
         db.session.add(student)
+        student_created()
+        bump_versions('students')
         db.session.commit()
+        app.student_cache.delete(student.id)
         
         return jsonify({'message': 'Student created successfully', 'student': student.to_dict()}), 201
     
@@ -254,461 +384,371 @@ def create_app(config_name='development'):
         student.emergency_contact = data.get('emergency_contact', student.emergency_contact)
         student.hostel_room = data.get('hostel_room', student.hostel_room)
         student.blood_group = data.get('blood_group', student.blood_group)
+        bump_versions('students', f'student:{student.id}')
         
         db.session.commit()
+        app.student_cache.delete(student.id)
         
         return jsonify({'message': 'Student updated successfully', 'student': student.to_dict()})
     
-    # ==================== OUTING REQUEST ROUTES ====================
-    
-    @app.route('/api/outing-requests', methods=['GET'])
-    def get_outing_requests():
-        student_id = request.args.get('student_id')
-        if student_id:
-            requests = OutingRequest.query.filter_by(student_id=student_id).order_by(OutingRequest.created_at.desc()).all()
+    def import_students(stream, fmt):
+        importer = StudentImporter(app.password_pool.hasher,
+                                   batch_size=app.config['IMPORT_BATCH_SIZE'],
+                                   processes=app.config['IMPORT_HASH_PROCESSES'])
+        return importer.run(read_rows(stream, fmt))
+    
+    @app.route('/api/students/import', methods=['POST'])
+    def import_students_upload():
+        """Bulk-create students from an uploaded CSV or NDJSON file"""
+        upload = request.files.get('file')
+        if upload:
+            stream, fmt = upload.stream, detect_format(upload.filename, upload.mimetype)
+        elif request.content_length:
+            stream, fmt = request.stream, detect_format(None, request.mimetype)
         else:
-            requests = OutingRequest.query.order_by(OutingRequest.created_at.desc()).all()
-        return jsonify({'requests': [r.to_dict() for r in requests]})
-    
-    @app.route('/api/outing-requests/<int:request_id>', methods=['GET'])
-    def get_outing_request(request_id):
-        request_obj = OutingRequest.query.get_or_404(request_id)
-        return jsonify(request_obj.to_dict())
-    
-    @app.route('/api/outing-requests', methods=['POST'])
-    def create_outing_request():
-        data = request.get_json()
-        
-        # Validate student exists
-        student = Student.query.get(data.get('student_id'))
-        if not student:
-            return jsonify({'error': 'Student not found'}), 404
-        
-        outing_request = OutingRequest(
-            student_id=data.get('student_id'),
-            outing_date=datetime.fromisoformat(data.get('outing_date')),
-            return_date=datetime.fromisoformat(data.get('return_date')),
-            reason=data.get('reason'),
-            details=data.get('details'),
-            emergency_contact=data.get('emergency_contact')
-        )
-        
-        db.session.add(outing_request)
-        db.session.commit()
-        
-        # Log status
-        status_log = RequestStatus(
-            request_type='outing',
-            request_id=outing_request.id,
-            status='pending',
-            notes='Outing request submitted'
-        )
-        db.session.add(status_log)
-        db.session.commit()
-        
-        return jsonify({
-            'message': 'Outing request submitted successfully',
-            'request': outing_request.to_dict()
-        }), 201
-    
-    @app.route('/api/outing-requests/<int:request_id>/status', methods=['PUT'])
-    def update_outing_status(request_id):
-        request_obj = OutingRequest.query.get_or_404(request_id)
-        data = request.get_json()
-        
-        request_obj.status = data.get('status', request_obj.status)
-        
-        # Log status change
-        status_log = RequestStatus(
-            request_type='outing',
-            request_id=request_obj.id,
-            status=request_obj.status,
-            updated_by=data.get('updated_by'),
-            notes=data.get('notes')
-        )
-        db.session.add(status_log)
-        db.session.commit()
-        
-        return jsonify({
-            'message': 'Status updated successfully',
-            'request': request_obj.to_dict()
-        })
+            return jsonify({'error': 'A CSV or NDJSON file is required'}), 400
+        report = import_students(stream, request.args.get('format', fmt))
+        return jsonify(report), 201 if report['imported'] else 200
+    
+    @app.cli.command('import-students')
+    @click.argument('path', type=click.Path(exists=True, dir_okay=False))
+    @click.option('--format', 'fmt', type=click.Choice(['csv', 'ndjson']), help='Defaults to the file extension')
+    def import_students_command(path, fmt):
+        """Bulk-create students from a CSV or NDJSON file"""
+        with open(path, 'rb') as f:
+            report = import_students(f, fmt or detect_format(path))
+        for error in report['errors']:
+            print(f"line {error['line']}: {error['error']}")
+        print(f"Imported {report['imported']} students, {report['failed']} rejected "
+              f"in {report['seconds']}s ({report['rows_per_second']} rows/sec)")
+    
+    # ==================== ORDER ROUTES ====================
+    
+    # One set of routes serves every service in the registry, e.g.
+    # /api/xerox-orders and /api/outing-requests/<id>/status
+    service_paths = f"<any({', '.join(map(repr, SERVICES_BY_PATH))}):path>"
+    
+    def parse_student_id(value):
+        """Request value -> Student.id, or None; used for the row and its version scopes alike"""
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return None
     
-    # ==================== XEROX ORDER ROUTES ====================
+    def find_order(service, order_id):
+        return Order.query.filter_by(id=order_id, service=service.name).first_or_404()
     
-    @app.route('/api/xerox-orders', methods=['GET'])
-    def get_xerox_orders():
+    @app.route(f'/api/{service_paths}', methods=['GET'])
+    @conditional(lambda: order_list_scopes(SERVICES_BY_PATH[request.view_args['path']].name))
+    def get_orders(path):
+        service = SERVICES_BY_PATH[path]
         student_id = request.args.get('student_id')
+        start, end = parse_day(request.args.get('from')), parse_day(request.args.get('to'))
+        # Plain column rows (student name joined in) serialized without ORM objects
+        query = list_query(Order).where(Order.service == service.name)
         if student_id:
-            orders = XeroxOrder.query.filter_by(student_id=student_id).order_by(XeroxOrder.created_at.desc()).all()
-        else:
-            orders = XeroxOrder.query.order_by(XeroxOrder.created_at.desc()).all()
-        return jsonify({'orders': [o.to_dict() for o in orders]})
-    
-    @app.route('/api/xerox-orders', methods=['POST'])
-    def create_xerox_order():
-        data = request.get_json()
-        
-        student = Student.query.get(data.get('student_id'))
-        if not student:
-            return jsonify({'error': 'Student not found'}), 404
-        
-        order = XeroxOrder(
-            student_id=data.get('student_id'),
-            service_type=data.get('service_type'),
-            pages=data.get('pages'),
-            delivery_location=data.get('delivery_location'),
-            instructions=data.get('instructions'),
-            contact_number=data.get('contact_number')
-        )
-        
-        db.session.add(order)
-        db.session.commit()
-        
-        status_log = RequestStatus(
-            request_type='xerox',
-            request_id=order.id,
-            status='pending',
-            notes='Xerox order submitted'
-        )
-        db.session.add(status_log)
-        db.session.commit()
-        
-        return jsonify({
-            'message': 'Xerox order submitted successfully',
-            'order': order.to_dict()
-        }), 201
-    
-    @app.route('/api/xerox-orders/<int:order_id>/status', methods=['PUT'])
-    def update_xerox_status(order_id):
-        order = XeroxOrder.query.get_or_404(order_id)
-        data = request.get_json()
-        
-        order.status = data.get('status', order.status)
-        
-        status_log = RequestStatus(
-            request_type='xerox',
-            request_id=order.id,
-            status=order.status,
-            updated_by=data.get('updated_by'),
-            notes=data.get('notes')
-        )
-        db.session.add(status_log)
-        db.session.commit()
-        
-        return jsonify({
-            'message': 'Status updated successfully',
-            'order': order.to_dict()
-        })
-    
-    # ==================== MESS ORDER ROUTES ====================
-    
-    @app.route('/api/mess-orders', methods=['GET'])
-    def get_mess_orders():
-        student_id = request.args.get('student_id')
+            query = query.where(Order.student_id == student_id)
+        # A date range may reach back into the archive
+        cold = [ArchivedOrder.service == service.name]
         if student_id:
-            orders = MessOrder.query.filter_by(student_id=student_id).order_by(MessOrder.created_at.desc()).all()
-        else:
-            orders = MessOrder.query.order_by(MessOrder.created_at.desc()).all()
-        return jsonify({'orders': [o.to_dict() for o in orders]})
-    
-    @app.route('/api/mess-orders', methods=['POST'])
-    def create_mess_order():
+            cold.append(ArchivedOrder.student_id == student_id)
+        orders, next_cursor = page_orders(app.order_archive, query, cold, start, end)
+        return json_response({service.list_key: orders, 'next_cursor': next_cursor})
+    
+    @app.route(f'/api/{service_paths}/<int:order_id>', methods=['GET'])
+    def get_order(path, order_id):
+        service = SERVICES_BY_PATH[path]
+        order = Order.query.filter_by(id=order_id, service=service.name).first()
+        if order is None:
+            record = find_archived(app.order_archive, service.name, order_id)
+            if record is None:
+                return jsonify({'error': 'Resource not found'}), 404
+            record.pop('history', None)
+            return jsonify(record)
+        return jsonify(order.to_dict())
+    
+    @app.route(f'/api/{service_paths}', methods=['POST'])
+    def create_order(path):
+        service = SERVICES_BY_PATH[path]
         data = request.get_json()
         
-        student = Student.query.get(data.get('student_id'))
-        if not student:
-            return jsonify({'error': 'Student not found'}), 404
-        
-        order = MessOrder(
-            student_id=data.get('student_id'),
-            meal_type=data.get('meal_type'),
-            meal_date=datetime.fromisoformat(data.get('meal_date')).date(),
-            quantity=data.get('quantity', 1),
-            special_requests=data.get('special_requests')
-        )
-        
-        db.session.add(order)
-        db.session.commit()
-        
-        status_log = RequestStatus(
-            request_type='mess',
-            request_id=order.id,
-            status='pending',
-            notes='Mess order submitted'
-        )
-        db.session.add(status_log)
-        db.session.commit()
-        
-        return jsonify({
-            'message': 'Mess order submitted successfully',
-            'order': order.to_dict()
-        }), 201
-    
-    @app.route('/api/mess-orders/<int:order_id>/status', methods=['PUT'])
-    def update_mess_status(order_id):
-        order = MessOrder.query.get_or_404(order_id)
-        data = request.get_json()
-        
-        order.status = data.get('status', order.status)
-        
-        status_log = RequestStatus(
-            request_type='mess',
-            request_id=order.id,
-            status=order.status,
-            updated_by=data.get('updated_by'),
-            notes=data.get('notes')
-        )
-        db.session.add(status_log)
-        db.session.commit()
-        
-        return jsonify({
-            'message': 'Status updated successfully',
-            'order': order.to_dict()
-        })
-    
-    # ==================== FIVESTAR ORDER ROUTES ====================
-    
-    @app.route('/api/fivestar-orders', methods=['GET'])
-    def get_fivestar_orders():
-        student_id = request.args.get('student_id')
-        if student_id:
-            orders = FivestarOrder.query.filter_by(student_id=student_id).order_by(FivestarOrder.created_at.desc()).all()
-        else:
-            orders = FivestarOrder.query.order_by(FivestarOrder.created_at.desc()).all()
-        return jsonify({'orders': [o.to_dict() for o in orders]})
-    
-    @app.route('/api/fivestar-orders', methods=['POST'])
-    def create_fivestar_order():
-        data = request.get_json()
-        
-        student = Student.query.get(data.get('student_id'))
-        if not student:
+        # Validate student exists
+        student_id = parse_student_id(data.get('student_id'))
+        if student_id is None or not get_student_profile(student_id):
             return jsonify({'error': 'Student not found'}), 404
         
-        order = FivestarOrder(
-            student_id=data.get('student_id'),
-            category=data.get('category'),
-            item=data.get('item'),
-            quantity=data.get('quantity', 1),
-            delivery_option=data.get('delivery_option'),
-            instructions=data.get('instructions'),
-            contact_number=data.get('contact_number')
-        )
+        try:
+            payload = service.build_payload(data)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
+        order = Order(service=service.name, student_id=student_id, payload=payload)
         db.session.add(order)
-        db.session.commit()
+        db.session.flush()  # assign order.id for the status log, commit once below
         
-        status_log = RequestStatus(
-            request_type='fivestar',
-            request_id=order.id,
-            status='pending',
-            notes='Fivestar order submitted'
-        )
-        db.session.add(status_log)
+        # Log status
+        app.audit_log.record(status_row(service.name, order.id, 'pending', notes=service.submitted_note))
+        order_created(service.name, order)
+        emit('created', service.name, order)
+        order_changed(service.name, order)
         db.session.commit()
         
         return jsonify({
-            'message': 'Fivestar order submitted successfully',
-            'order': order.to_dict()
+            'message': f'{service.label} submitted successfully',
+            service.item_key: order.to_dict()
         }), 201
     
-    @app.route('/api/fivestar-orders/<int:order_id>/status', methods=['PUT'])
-    def update_fivestar_status(order_id):
-        order = FivestarOrder.query.get_or_404(order_id)
+    @app.route(f'/api/{service_paths}/<int:order_id>/status', methods=['PUT'])
+    def update_order_status(path, order_id):
+        service = SERVICES_BY_PATH[path]
+        order = find_order(service, order_id)
         data = request.get_json()
         
+        old_status = order.status
         order.status = data.get('status', order.status)
+        status_changed(service.name, old_status, order.status)
+        if order.status != old_status:
+            emit('status', service.name, order)
+            order_changed(service.name, order)
         
-        status_log = RequestStatus(
-            request_type='fivestar',
-            request_id=order.id,
-            status=order.status,
-            updated_by=data.get('updated_by'),
-            notes=data.get('notes')
-        )
-        db.session.add(status_log)
+        # Log status change
+        app.audit_log.record(status_row(service.name, order.id, order.status,
+                                        notes=data.get('notes'), updated_by=data.get('updated_by')))
         db.session.commit()
         
         return jsonify({
             'message': 'Status updated successfully',
-            'order': order.to_dict()
+            service.item_key: order.to_dict()
         })
     
-    # ==================== CCD ORDER ROUTES ====================
-    
-    @app.route('/api/ccd-orders', methods=['GET'])
-    def get_ccd_orders():
-        student_id = request.args.get('student_id')
-        if student_id:
-            orders = CCDOrder.query.filter_by(student_id=student_id).order_by(CCDOrder.created_at.desc()).all()
-        else:
-            orders = CCDOrder.query.order_by(CCDOrder.created_at.desc()).all()
-        return jsonify({'orders': [o.to_dict() for o in orders]})
-    
-    @app.route('/api/ccd-orders', methods=['POST'])
-    def create_ccd_order():
-        data = request.get_json()
-        
-        student = Student.query.get(data.get('student_id'))
-        if not student:
-            return jsonify({'error': 'Student not found'}), 404
-        
-        order = CCDOrder(
-            student_id=data.get('student_id'),
-            category=data.get('category'),
-            item=data.get('item'),
-            quantity=data.get('quantity', 1),
-            size=data.get('size'),
-            instructions=data.get('instructions'),
-            contact_number=data.get('contact_number')
-        )
-        
-        db.session.add(order)
-        db.session.commit()
-        
-        status_log = RequestStatus(
-            request_type='ccd',
-            request_id=order.id,
-            status='pending',
-            notes='CCD order submitted'
-        )
-        db.session.add(status_log)
+    # ==================== BATCH ORDERS ====================
+
+    MAX_BATCH_SIZE = 500
+
+    @app.route('/api/orders/batch', methods=['POST'])
+    def create_orders_batch():
+        """Submit many orders across services in one transaction"""
+        data = request.get_json(silent=True)
+        # Either a bare array of orders or {"orders": [...]}
+        items = data.get('orders') if isinstance(data, dict) else data
+        if not isinstance(items, list) or not items:
+            return jsonify({'error': 'orders must be a non-empty list'}), 400
+        if len(items) > MAX_BATCH_SIZE:
+            return jsonify({'error': f'At most {MAX_BATCH_SIZE} orders per batch'}), 400
+
+        def student_key(item):
+            return parse_student_id(item.get('student_id')) if isinstance(item, dict) else None
+
+        # One query for every student referenced by the batch
+        wanted = {student_key(item) for item in items} - {None}
+        known = {row.id for row in db.session.query(Student.id).filter(Student.id.in_(wanted))}
+
+        results = [None] * len(items)
+        accepted = []
+        for index, item in enumerate(items):
+            if not isinstance(item, dict):
+                results[index] = {'index': index, 'error': 'Order must be an object'}
+                continue
+            service = item.get('service')
+            if not isinstance(service, str) or service not in SERVICES:
+                results[index] = {'index': index, 'error': 'Unknown service'}
+                continue
+            student_id = student_key(item)
+            if student_id not in known:
+                results[index] = {'index': index, 'service': service, 'error': 'Student not found'}
+                continue
+            try:
+                payload = SERVICES[service].build_payload(item)
+            except ValueError as e:
+                results[index] = {'index': index, 'service': service, 'error': str(e)}
+                continue
+            accepted.append((index, service, Order(service=service, student_id=student_id, payload=payload)))
+
+        if not accepted:
+            return jsonify({'created': 0, 'failed': len(items), 'results': results}), 400
+
+        db.session.add_all([order for _, _, order in accepted])
+        db.session.flush()
+        app.audit_log.record(*[status_row(service, order.id, order.status, notes=SERVICES[service].submitted_note)
+                               for _, service, order in accepted])
+        orders_created([(service, order) for _, service, order in accepted])
+        emit_many('created', [(service, order) for _, service, order in accepted])
+        # Each distinct list version once, not two UPDATEs per order
+        bump_versions(*sorted({f'student:{order.student_id}' for _, _, order in accepted} |
+                              {f'service:{service}' for _, service, _ in accepted}))
+        # Read ids before the commit expires every order
+        for index, service, order in accepted:
+            results[index] = {'index': index, 'service': service, 'id': order.id, 'status': order.status}
         db.session.commit()
-        
+
         return jsonify({
-            'message': 'CCD order submitted successfully',
-            'order': order.to_dict()
+            'created': len(accepted),
+            'failed': len(items) - len(accepted),
+            'results': results
         }), 201
-    
-    @app.route('/api/ccd-orders/<int:order_id>/status', methods=['PUT'])
-    def update_ccd_status(order_id):
-        order = CCDOrder.query.get_or_404(order_id)
-        data = request.get_json()
-        
-        order.status = data.get('status', order.status)
-        
-        status_log = RequestStatus(
-            request_type='ccd',
-            request_id=order.id,
-            status=order.status,
-            updated_by=data.get('updated_by'),
-            notes=data.get('notes')
-        )
-        db.session.add(status_log)
-        db.session.commit()
-        
-        return jsonify({
-            'message': 'Status updated successfully',
-            'order': order.to_dict()
-        })
-    
-    # ==================== STATIONARY ORDER ROUTES ====================
-    
-    @app.route('/api/stationary-orders', methods=['GET'])
-    def get_stationary_orders():
-        student_id = request.args.get('student_id')
-        if student_id:
-            orders = StationaryOrder.query.filter_by(student_id=student_id).order_by(StationaryOrder.created_at.desc()).all()
+
+    # ==================== UNIFIED ORDER FEED ====================
+
+    @app.route('/api/my-orders', methods=['GET'])
+    @conditional(lambda: [f"student:{request.args.get('student_id', type=int) or session.get('student_id')}"])
+    def get_my_orders():
+        """Merged, newest-first order feed across all services for one student"""
+        student_id = request.args.get('student_id', type=int) or session.get('student_id')
+        if not student_id:
+            return jsonify({'error': 'Not authenticated'}), 401
+
+        service_arg = request.args.get('service')
+        services = [s.strip() for s in service_arg.split(',')] if service_arg else list(SERVICES)
+        unknown = [s for s in services if s not in SERVICES]
+        if unknown:
+            return jsonify({'error': f'Unknown service: {", ".join(unknown)}'}), 400
+
+        # A single range scan of ix_orders_student_created, whatever the services
+        query = list_query(Order).where(Order.student_id == student_id)
+        if service_arg:
+            query = query.where(Order.service.in_(services))
+        start, end = parse_day(request.args.get('from')), parse_day(request.args.get('to'))
+        # A date range may reach back into the archive
+        cold = [ArchivedOrder.student_id == student_id]
+        if service_arg:
+            cold.append(ArchivedOrder.service.in_(services))
+        orders, next_cursor = page_orders(app.order_archive, query, cold, start, end)
+        return json_response({'orders': orders, 'next_cursor': next_cursor})
+
+    # ==================== EVENT STREAM ====================
+
+    # Each open stream holds a server thread for EVENT_STREAM_TIMEOUT seconds
+    stream_slots = threading.BoundedSemaphore(app.config['EVENT_STREAM_LIMIT']) \
+        if app.config['EVENT_STREAM_LIMIT'] > 0 else None
+
+    @app.route('/api/events', methods=['GET'])
+    def order_events():
+        """Server-Sent Events stream of order changes for a student, or for a shop with ?service="""
+        service = request.args.get('service')
+        student_id = None
+        if service:
+            if service not in SERVICES:
+                return jsonify({'error': f'Unknown service: {service}'}), 400
         else:
-            orders = StationaryOrder.query.order_by(StationaryOrder.created_at.desc()).all()
-        return jsonify({'orders': [o.to_dict() for o in orders]})
-    
-    @app.route('/api/stationary-orders', methods=['POST'])
-    def create_stationary_order():
-        data = request.get_json()
-        
-        student = Student.query.get(data.get('student_id'))
-        if not student:
-            return jsonify({'error': 'Student not found'}), 404
-        
-        order = StationaryOrder(
-            student_id=data.get('student_id'),
-            category=data.get('category'),
-            item=data.get('item'),
-            quantity=data.get('quantity', 1),
-            delivery_option=data.get('delivery_option'),
-            instructions=data.get('instructions'),
-            contact_number=data.get('contact_number')
-        )
-        
-        db.session.add(order)
-        db.session.commit()
-        
-        status_log = RequestStatus(
-            request_type='stationary',
-            request_id=order.id,
-            status='pending',
-            notes='Stationary order submitted'
-        )
-        db.session.add(status_log)
-        db.session.commit()
-        
-        return jsonify({
-            'message': 'Stationary order submitted successfully',
-            'order': order.to_dict()
-        }), 201
-    
-    @app.route('/api/stationary-orders/<int:order_id>/status', methods=['PUT'])
-    def update_stationary_status(order_id):
-        order = StationaryOrder.query.get_or_404(order_id)
-        data = request.get_json()
-        
-        order.status = data.get('status', order.status)
-        
-        status_log = RequestStatus(
-            request_type='stationary',
-            request_id=order.id,
-            status=order.status,
-            updated_by=data.get('updated_by'),
-            notes=data.get('notes')
-        )
-        db.session.add(status_log)
-        db.session.commit()
-        
-        return jsonify({
-            'message': 'Status updated successfully',
-            'order': order.to_dict()
-        })
-    
+            student_id = request.args.get('student_id', type=int) or session.get('student_id')
+            if not student_id:
+                return jsonify({'error': 'Not authenticated'}), 401
+
+        # Resume after the last event the client saw, otherwise start from now
+        last_id = request.headers.get('Last-Event-ID', type=int)
+        if last_id is None:
+            last_id = request.args.get('last_event_id', type=int)
+        if last_id is None:
+            last_id = latest_event_id()
+
+        # With every slot taken answer 204, which tells EventSource not to
+        # reconnect; the page then refreshes after its own submits instead
+        if stream_slots is None or not stream_slots.acquire(blocking=False):
+            return '', 204
+
+        stream = stream_events(last_id,
+                               app.config['EVENT_STREAM_TIMEOUT'],
+                               app.config['EVENT_POLL_INTERVAL'],
+                               student_id=student_id,
+                               service=service)
+        response = Response(stream_with_context(stream), mimetype='text/event-stream',
+                            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+        # The server closes the response however the stream ends
+        response.call_on_close(stream_slots.release)
+        return response
+
+    @app.cli.command('prune-events')
+    @click.option('--hours', default=24, help='Delete events older than this many hours')
+    def prune_events_command(hours):
+        """Delete old order events"""
+        print(f"Deleted {prune_events(timedelta(hours=hours))} events")
+
+    # ==================== EXPORTS ====================
+
+    @app.route('/api/export/<name>', methods=['GET'])
+    def export_orders(name):
+        """Stream a service's orders as CSV or NDJSON
+
+        Query args: format (csv|ndjson), from / to (YYYY-MM-DD, inclusive),
+        status (comma separated).
+        """
+        service = SERVICES.get(name)
+        if service is None:
+            return jsonify({'error': f'Unknown service: {name}'}), 404
+        fmt = request.args.get('format', 'csv')
+        if fmt not in FORMATS:
+            raise InvalidExportFilter(f'Unsupported format: {fmt}')
+        statuses = [s for s in request.args.get('status', '').split(',') if s]
+        stmt = export_query(service,
+                            start=parse_day(request.args.get('from')),
+                            end=parse_day(request.args.get('to')),
+                            statuses=statuses)
+        filename = f"{name}-orders-{datetime.now().strftime('%Y%m%d-%H%M%S')}.{fmt}"
+        return Response(stream_with_context(stream_rows(stmt, fmt, export_columns(service))), mimetype=FORMATS[fmt],
+                        headers={'Content-Disposition': f'attachment; filename={filename}'})
+
     # ==================== STATUS HISTORY ROUTES ====================
     
     @app.route('/api/status-history/<request_type>/<int:request_id>', methods=['GET'])
     def get_status_history(request_type, request_id):
-        history = RequestStatus.query.filter_by(
-            request_type=request_type,
-            request_id=request_id
-        ).order_by(RequestStatus.created_at.desc()).all()
-        return jsonify({'history': [h.to_dict() for h in history]})
+        app.audit_log.flush()  # include rows still waiting in the write-behind buffer
+        query = list_query(RequestStatus).where(
+            (RequestStatus.request_type == request_type) &
+            (RequestStatus.request_id == request_id)
+        )
+        history, next_cursor = paginate_rows(query, RequestStatus)
+        if not history and not request.args.get('cursor'):
+            # Archived orders keep their whole history in the archive record
+            record = find_archived(app.order_archive, request_type, request_id)
+            if record:
+                history = record['history']
+        return json_response({'history': history, 'next_cursor': next_cursor})
     
     # ==================== DASHBOARD STATS ====================
     
     @app.route('/api/dashboard/stats', methods=['GET'])
     def get_dashboard_stats():
+        # Primary-key reads of the counters kept up to date by the order views
+        today = datetime.now().date().isoformat()
+        keys = [('students', 'total')]
+        for service in SERVICES:
+            keys += [(service, 'status:pending'), (service, f'created:{today}')]
+        counts = read_counters(keys)
+        
         stats = {
-            'total_students': Student.query.count(),
-            'pending_outings': OutingRequest.query.filter_by(status='pending').count(),
-            'pending_xerox': XeroxOrder.query.filter_by(status='pending').count(),
-            'pending_mess': MessOrder.query.filter_by(status='pending').count(),
-            'pending_fivestar': FivestarOrder.query.filter_by(status='pending').count(),
-            'pending_ccd': CCDOrder.query.filter_by(status='pending').count(),
-            'pending_stationary': StationaryOrder.query.filter_by(status='pending').count(),
-            'today_orders': {
-                'outing': OutingRequest.query.filter(db.func.date(OutingRequest.created_at) == datetime.now().date()).count(),
-                'xerox': XeroxOrder.query.filter(db.func.date(XeroxOrder.created_at) == datetime.now().date()).count(),
-                'mess': MessOrder.query.filter(db.func.date(MessOrder.created_at) == datetime.now().date()).count(),
-                'fivestar': FivestarOrder.query.filter(db.func.date(FivestarOrder.created_at) == datetime.now().date()).count(),
-                'ccd': CCDOrder.query.filter(db.func.date(CCDOrder.created_at) == datetime.now().date()).count(),
-                'stationary': StationaryOrder.query.filter(db.func.date(StationaryOrder.created_at) == datetime.now().date()).count()
-            }
+            'total_students': counts[('students', 'total')],
+            'pending_outings': counts[('outing', 'status:pending')],
+            'pending_xerox': counts[('xerox', 'status:pending')],
+            'pending_mess': counts[('mess', 'status:pending')],
+            'pending_fivestar': counts[('fivestar', 'status:pending')],
+            'pending_ccd': counts[('ccd', 'status:pending')],
+            'pending_stationary': counts[('stationary', 'status:pending')],
+            'today_orders': {service: counts[(service, f'created:{today}')] for service in SERVICES}
         }
         return jsonify(stats)
     
+    @app.cli.command('archive-orders')
+    @click.option('--days', type=int, help='Archive finished orders older than this (default ARCHIVE_AFTER_DAYS)')
+    def archive_orders_command(days):
+        """Move old finished orders and their status history to the archive"""
+        days = app.config['ARCHIVE_AFTER_DAYS'] if days is None else days
+        app.audit_log.flush()  # their status rows must be in the table to be archived
+        moved = archive_orders(app.order_archive, datetime.utcnow() - timedelta(days=days),
+                               app.config['ARCHIVE_BATCH_SIZE'])
+        print(f"Archived {moved} orders to {app.config['ARCHIVE_DIR']}")
+    
+    @app.cli.command('reconcile-counters')
+    def reconcile_counters_command():
+        """Rebuild dashboard counters from the order tables"""
+        with db.engine.begin() as conn:
+            rows = reconcile_counters(conn)
+        print(f"Rebuilt {rows} counters")
+    
     # ==================== WHATSAPP INTEGRATION ====================
 
     @app.route('/api/whatsapp/send', methods=['POST'])
     def send_whatsapp_message():
-        """Send WhatsApp message via Twilio"""
+        """Queue a WhatsApp message for background delivery"""
         data = request.get_json()
 
         phone = data.get('phone')
@@ -718,47 +758,29 @@ def create_app(config_name='development'):
         if not phone or not message:
             return jsonify({'error': 'Phone number and message are required'}), 400
 
-        try:
-            # Import Twilio client
-            from twilio.rest import Client
-
-            # Get Twilio credentials from environment
-            account_sid = os.getenv('TWILIO_ACCOUNT_SID')
-            auth_token = os.getenv('TWILIO_AUTH_TOKEN')
-            whatsapp_number = os.getenv('TWILIO_WHATSAPP_NUMBER', 'whatsapp:+14155238886')  # Twilio sandbox number
-
-            if not account_sid or not auth_token:
-                # Fallback to logging if Twilio not configured
-                print(f"WhatsApp message to {phone}: {message}")
-                return jsonify({
-                    'message': 'WhatsApp message logged (Twilio not configured)',
-                    'phone': phone,
-                    'service': service
-                })
-
-            client = Client(account_sid, auth_token)
-
-            # Format phone number for WhatsApp
-            if not phone.startswith('+'):
-                phone = f'+91{phone}'  # Assuming Indian numbers, adjust as needed
-
-            # Send WhatsApp message
-            message_response = client.messages.create(
-                from_=whatsapp_number,
-                body=message,
-                to=f'whatsapp:{phone}'
-            )
+        queued = enqueue(phone, message, service, delay=app.config['NOTIFICATION_COALESCE_WINDOW'])
+        db.session.commit()
+        if app.notification_worker:
+            app.notification_worker.notify()
+
+        return jsonify({
+            'message': 'WhatsApp message queued',
+            'id': queued.id,
+            'phone': phone,
+            'service': service
+        }), 202
 
-            return jsonify({
-                'message': 'WhatsApp message sent successfully',
-                'message_sid': message_response.sid,
-                'phone': phone,
-                'service': service
-            })
+    @app.route('/api/whatsapp/messages/<int:message_id>', methods=['GET'])
+    def get_whatsapp_message(message_id):
+        """Delivery status of a queued WhatsApp message"""
+        message = WhatsAppMessage.query.get_or_404(message_id)
+        return jsonify(message.to_dict())
 
-        except Exception as e:
-            print(f"Error sending WhatsApp message: {e}")
-            return jsonify({'error': 'Failed to send WhatsApp message', 'details': str(e)}), 500
+    @app.cli.command('send-notifications')
+    def send_notifications_command():
+        """Deliver all due WhatsApp messages once and exit"""
+        attempted = deliver_due(app.whatsapp_transport, app.config)
+        print(f"Attempted {attempted} messages")
     
     # ==================== WEBHOOKS ====================
     
@@ -789,15 +811,52 @@ def create_app(config_name='development'):
     def not_found(error):
         return jsonify({'error': 'Resource not found'}), 404
     
+    @app.errorhandler(InvalidCursor)
+    def invalid_cursor(error):
+        return jsonify({'error': str(error)}), 400
+    
+    @app.errorhandler(InvalidExportFilter)
+    def invalid_export_filter(error):
+        return jsonify({'error': str(error)}), 400
+    
     @app.errorhandler(500)
     def internal_error(error):
         return jsonify({'error': 'Internal server error'}), 500
     
+    # ==================== WARM-UP ====================
+    
+    def warm_up():
+        """Pay first-request costs before serving traffic"""
+        transport_warm_up = getattr(app.whatsapp_transport, 'warm_up', None)
+        if transport_warm_up:
+            try:
+                transport_warm_up()
+            except ImportError as e:
+                print(f"WhatsApp transport unavailable: {e}")
+        configure_mappers()
+        app.password_pool.dummy_hash  # first unknown login shouldn't pay for it
+        with app.app_context():
+            # Hold several at once so the pool keeps that many open (and their pragmas set)
+            connections = [db.engine.connect() for _ in range(app.config['WARMUP_CONNECTIONS'])]
+            for conn in connections:
+                conn.execute(db.text('SELECT 1'))
+                conn.close()
+        # Read-only requests compile the hot statements into SQLAlchemy's cache
+        client = app.test_client()
+        for path in ['/api/health', '/api/dashboard/stats',
+                     *(f'/api/{service.path}?limit=1' for service in SERVICES.values())]:
+            client.get(path)
+    
+    # Run by the server in each worker before it takes traffic (post_fork in
+    # gunicorn.conf.py), since pooled connections don't survive a fork
+    app.warm_up = warm_up
+    
     return app
 
 # Create application instance
 app = create_app()
 
 if __name__ == '__main__':
+    app.start_background()
     app.run(host='0.0.0.0:0', port=5001, debug=True)
 
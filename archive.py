@@ -0,0 +1,219 @@
+"""
+Cold storage for finished orders in College Portal
+
+Orders that reached one of their service's terminal statuses more than
+ARCHIVE_AFTER_DAYS ago are moved out of the orders and request_statuses
+tables by `flask archive-orders`, so the hot tables and their indexes stop
+growing with the portal's age. Each order is written, together with its
+status history, as one JSON line to a gzip file partitioned by service and
+creation day:
+
+    ARCHIVE_DIR/<service>/<YYYY-MM-DD>.ndjson.gz
+
+Every run appends a new gzip member; readers see the members as one stream.
+A small archived_orders table indexes the files by (student_id, created_at)
+and (service, created_at), so list endpoints asked for a date range can page
+through both tiers without opening every file.
+
+A record is written before its hot rows are deleted, so an interrupted run
+at worst leaves a duplicate line behind; readers keep the last copy.
+"""
+import gzip
+import heapq
+import json
+import os
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+
+from models import db, ArchivedOrder, Order, RequestStatus, Student
+from pagination import page_args, apply_keyset, encode_cursor
+from serializers import serializer_for, list_query, paginate_rows
+from services import SERVICES
+from versions import bump_versions
+
+archived = ArchivedOrder.__table__
+
+
+class OrderArchive:
+    """Date-partitioned, gzip-compressed NDJSON files of archived orders"""
+
+    def __init__(self, root):
+        self.root = root
+
+    def path(self, service, day):
+        return os.path.join(self.root, service, f'{day.isoformat()}.ndjson.gz')
+
+    def append(self, service, day, records):
+        path = self.path(service, day)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'ab') as raw:
+            with gzip.GzipFile(fileobj=raw, mode='wb') as out:
+                for record in records:
+                    out.write(json.dumps(record, separators=(',', ':')).encode())
+                    out.write(b'\n')
+            raw.flush()
+            os.fsync(raw.fileno())  # on disk before the hot rows go
+
+    def read(self, service, day):
+        """{order id: record} for one partition"""
+        records = {}
+        try:
+            with gzip.open(self.path(service, day), 'rb') as stream:
+                for line in stream:
+                    record = json.loads(line)
+                    records[record['id']] = record
+        except FileNotFoundError:
+            pass
+        return records
+
+    def load(self, keys):
+        """Records for (service, created_at, order id) keys, opening each partition once"""
+        wanted = defaultdict(list)
+        for service, created_at, order_id in keys:
+            wanted[(service, created_at.date())].append(order_id)
+        found = {}
+        for (service, day), ids in wanted.items():
+            records = self.read(service, day)
+            found.update({(service, i): records[i] for i in ids if i in records})
+        return found
+
+
+def archive_orders(archive, cutoff, batch_size=1000):
+    """Move terminal orders created before cutoff to the archive; returns the count"""
+    orders = Order.__table__
+    statuses = RequestStatus.__table__
+    order_fields = serializer_for(Order)
+    history_fields = serializer_for(RequestStatus)
+    # Keep the newest order hot: SQLite hands out max(id) + 1, so deleting it
+    # would let a new order reuse an archived id
+    newest = db.session.execute(select(db.func.max(orders.c.id))).scalar()
+    moved = 0
+    for service in SERVICES.values():
+        if not service.terminal_statuses:
+            continue
+        while True:
+            rows = db.session.execute(
+                list_query(Order)
+                .where(orders.c.service == service.name,
+                       orders.c.status.in_(service.terminal_statuses),
+                       orders.c.created_at < cutoff,
+                       orders.c.id != newest)
+                .order_by(orders.c.id)
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                break
+            ids = [row.id for row in rows]
+            history = defaultdict(list)
+            for row in db.session.execute(
+                list_query(RequestStatus)
+                .where(statuses.c.request_type == service.name, statuses.c.request_id.in_(ids))
+                .order_by(statuses.c.created_at.desc(), statuses.c.id.desc())
+            ):
+                history[row.request_id].append(history_fields.serialize(row))
+
+            by_day = defaultdict(list)
+            for row in rows:
+                record = order_fields.serialize(row)
+                record['history'] = history[row.id]
+                by_day[row.created_at.date()].append(record)
+            for day, records in by_day.items():
+                archive.append(service.name, day, records)
+
+            db.session.execute(archived.insert(), [{
+                'order_id': row.id,
+                'service': row.service,
+                'student_id': row.student_id,
+                'status': row.status,
+                'created_at': row.created_at
+            } for row in rows])
+            db.session.execute(statuses.delete().where(statuses.c.request_type == service.name,
+                                                       statuses.c.request_id.in_(ids)))
+            db.session.execute(orders.delete().where(orders.c.id.in_(ids)))
+            bump_versions(f'service:{service.name}', *sorted({f'student:{row.student_id}' for row in rows}))
+            db.session.commit()
+            moved += len(rows)
+    return moved
+
+
+def day_bounds(start, end):
+    """created_at bounds for inclusive start / end dates (either may be None)"""
+    low = datetime.combine(start, datetime.min.time()) if start else None
+    high = datetime.combine(end + timedelta(days=1), datetime.min.time()) if end else None
+    return low, high
+
+
+def in_range(column, start, end):
+    low, high = day_bounds(start, end)
+    clauses = []
+    if low:
+        clauses.append(column >= low)
+    if high:
+        clauses.append(column < high)
+    return clauses
+
+
+def paginate_orders(archive, hot, cold, start=None, end=None):
+    """One keyset page of orders from both tiers; returns (dicts, next_cursor)
+
+    hot is a list_query(Order) and cold a list of archived_orders criteria
+    selecting the same orders; both are limited to the start / end dates.
+    """
+    limit, key = page_args()
+    orders = Order.__table__
+    hot = apply_keyset(hot.where(*in_range(orders.c.created_at, start, end)),
+                       orders.c.created_at, orders.c.id, key)
+    serialize = serializer_for(Order).serialize
+    page = [(row.created_at, row.id, serialize(row))
+            for row in db.session.execute(hot.limit(limit + 1))]
+
+    cold = apply_keyset(
+        select(archived.c.order_id, archived.c.service, archived.c.created_at,
+               Student.name.label('student_name'))
+        .select_from(archived.outerjoin(Student.__table__, archived.c.student_id == Student.id))
+        .where(*cold, *in_range(archived.c.created_at, start, end)),
+        archived.c.created_at, archived.c.order_id, key)
+    rows = db.session.execute(cold.limit(limit + 1)).all()
+    records = archive.load((row.service, row.created_at, row.order_id) for row in rows)
+    for row in rows:
+        record = records.get((row.service, row.order_id))
+        if record is None:
+            continue  # partition file missing; nothing to show
+        record = dict(record)
+        record.pop('history', None)
+        record['student_name'] = row.student_name  # names can change after archiving
+        page.append((row.created_at, row.order_id, record))
+
+    page = heapq.nlargest(limit + 1, page, key=lambda item: (item[0], item[1]))
+    next_cursor = None
+    if len(page) > limit:
+        page = page[:limit]
+        next_cursor = encode_cursor(page[-1][0], page[-1][1])
+    return [item[2] for item in page], next_cursor
+
+
+def page_orders(archive, hot, cold, start=None, end=None):
+    """One page of orders; only a start / end date range reads the archive too
+
+    Takes the same arguments as paginate_orders() and returns (dicts, next_cursor).
+    """
+    if start or end:
+        return paginate_orders(archive, hot, cold, start, end)
+    return paginate_rows(hot, Order)
+
+
+def find_archived(archive, service, order_id):
+    """The archived record of one order (with its 'history'), or None"""
+    row = db.session.execute(
+        select(archived.c.service, archived.c.created_at, Student.name.label('student_name'))
+        .select_from(archived.outerjoin(Student.__table__, archived.c.student_id == Student.id))
+        .where(archived.c.order_id == order_id, archived.c.service == service)
+    ).first()
+    if row is None:
+        return None
+    record = archive.load([(row.service, row.created_at, order_id)]).get((service, order_id))
+    if record is not None:
+        record['student_name'] = row.student_name  # as in the list endpoints
+    return record
@@ -0,0 +1,141 @@
+"""
+Order status audit log (RequestStatus rows) for College Portal
+
+Every order create and status change appends a status row, which makes the
+audit log the busiest writer in the app. AUDIT_LOG_MODE selects how the rows
+are written:
+
+    sync      inserted in the same transaction as the change (durable with it)
+    buffered  queued in memory once the change commits and written by a
+              background thread in batches with one executemany, every
+              AUDIT_FLUSH_INTERVAL seconds or as soon as AUDIT_BATCH_SIZE rows
+              are waiting. The buffer is flushed on graceful shutdown; rows
+              still buffered when a process is killed outright are lost.
+              Processes that never start the flusher (CLI commands,
+              scripts) write inline as in sync mode.
+"""
+import atexit
+import logging
+import threading
+from datetime import datetime
+
+from sqlalchemy import event as sa_event
+from sqlalchemy.orm import Session
+
+from models import db, RequestStatus
+
+logger = logging.getLogger(__name__)
+
+statuses = RequestStatus.__table__
+
+
+def status_row(service, order_id, status, notes=None, updated_by=None):
+    return {
+        'request_type': service,
+        'request_id': order_id,
+        'status': status,
+        'updated_by': updated_by,
+        'notes': notes,
+        'created_at': datetime.utcnow()
+    }
+
+
+class AuditLog:
+    """Writes status rows directly or through a group-commit buffer"""
+
+    def __init__(self, app, mode='sync', batch_size=500, flush_interval=0.05):
+        if mode not in ('sync', 'buffered'):
+            raise ValueError(f'Unknown AUDIT_LOG_MODE: {mode}')
+        self.app = app
+        self.mode = mode
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.buffer = []
+        self.lock = threading.Lock()  # guards buffer
+        self.flush_lock = threading.Lock()  # one writer at a time
+        self.wakeup = threading.Event()
+        self.stopping = False
+        self.thread = None
+
+    def record(self, *rows):
+        """Log status rows as part of the current session's transaction"""
+        if self.mode == 'sync' or self.thread is None:
+            # No flusher in this process (CLI command, script): write inline
+            db.session.execute(statuses.insert(), list(rows))
+            return
+        # Only buffer once the transaction commits; see _hand_over. Begin the
+        # transaction now so a rollback before any SQL still discards the rows
+        session = db.session()
+        if not session.in_transaction():
+            session.begin()
+        session.info.setdefault('audit_rows', []).extend(rows)
+        session.info['audit_log'] = self
+
+    def enqueue(self, rows):
+        with self.lock:
+            self.buffer.extend(rows)
+            full = len(self.buffer) >= self.batch_size
+        if full:
+            self.wakeup.set()
+
+    def flush(self):
+        """Write everything buffered so far; returns the number of rows"""
+        with self.flush_lock:
+            with self.lock:
+                rows, self.buffer = self.buffer, []
+            if not rows:
+                return 0
+            try:
+                with self.app.app_context():
+                    with db.engine.begin() as conn:
+                        conn.execute(statuses.insert(), rows)
+            except Exception:
+                # Keep the rows, in order, for the next attempt
+                with self.lock:
+                    self.buffer[:0] = rows
+                raise
+            return len(rows)
+
+    def start(self):
+        if self.mode != 'buffered' or self.thread:
+            return
+        self.thread = threading.Thread(target=self._run, name='audit-log', daemon=True)
+        self.thread.start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        """Stop the flusher and write whatever is left"""
+        self.stopping = True
+        self.wakeup.set()
+        if self.thread:
+            self.thread.join()
+            self.thread = None
+        self.flush()
+
+    def _run(self):
+        while not self.stopping:
+            self.wakeup.wait(self.flush_interval)
+            self.wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Audit log flush failed, will retry')
+
+
+@sa_event.listens_for(Session, 'after_commit')
+def _hand_over(session):
+    if session.in_nested_transaction():
+        return  # a released savepoint; the rows wait for the real commit
+    log = session.info.pop('audit_log', None)
+    rows = session.info.pop('audit_rows', None)
+    if log and rows:
+        log.enqueue(rows)
+
+
+@sa_event.listens_for(Session, 'after_transaction_end')
+def _discard(session, transaction):
+    # A root transaction that ended without committing takes its rows with it
+    # (after_rollback would also fire for a rolled back savepoint)
+    if transaction.parent is None:
+        session.info.pop('audit_log', None)
+        session.info.pop('audit_rows', None)
@@ -0,0 +1,206 @@
+"""
+Caching for College Portal
+
+Two interchangeable backends, selected with CACHE_BACKEND:
+
+    local    LRUCache - in-process, fastest, but each gunicorn worker has its
+             own copy, so an invalidation only reaches the worker that made it
+    sqlite   SQLiteCache - one SQLite file shared by every worker on the host;
+             deletes are seen by all workers at once
+
+Unless CACHE_SQLITE_PATH is set, the SQLite file is named after the database
+the app uses, so separate instances on one host (staging and production,
+the test suite) never read each other's entries.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy.engine import make_url
+
+
+class LRUCache:
+    """Thread-safe LRU cache with a per-entry time to live"""
+
+    def __init__(self, maxsize=1024, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.entries = OrderedDict()  # key -> (expires_at, value)
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Return the cached value, or None if absent or expired"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self.entries[key]
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'backend': 'local',
+                'size': len(self.entries),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else None
+            }
+
+
+class SQLiteCache:
+    """Cache shared by all processes on one host through a local SQLite file
+
+    Keys are stored as <namespace>:<generation>:<key>. clear() bumps the
+    namespace generation, which invalidates every entry for every worker in a
+    single write; the orphaned rows are purged as the cache is trimmed.
+    Values must be JSON serializable.
+    """
+
+    PURGE_EVERY = 100  # sets between expiry/size sweeps
+
+    def __init__(self, path, namespace, maxsize=1024, ttl=300):
+        self.path = path
+        self.namespace = namespace
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.sets = 0
+        conn = self._connect()
+        conn.execute('CREATE TABLE IF NOT EXISTS cache_entries '
+                     '(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)')
+        conn.execute('CREATE INDEX IF NOT EXISTS ix_cache_entries_expires ON cache_entries (expires_at)')
+        conn.execute('CREATE TABLE IF NOT EXISTS cache_generations '
+                     '(namespace TEXT PRIMARY KEY, generation INTEGER NOT NULL)')
+
+    def _connect(self):
+        # One connection per thread, reopened after a fork
+        conn = getattr(self.local, 'conn', None)
+        if conn is None or self.local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self.local.conn, self.local.pid = conn, os.getpid()
+        return conn
+
+    # Resolves the versioned key inside the statement, so reads and writes
+    # always use the generation current at that moment
+    VERSIONED_KEY = ("? || ':' || COALESCE((SELECT generation FROM cache_generations "
+                     "WHERE namespace = ?), 0) || ':' || ?")
+
+    def get(self, key):
+        row = self._connect().execute(
+            f'SELECT value, expires_at FROM cache_entries WHERE key = {self.VERSIONED_KEY}',
+            (self.namespace, self.namespace, str(key))
+        ).fetchone()
+        with self.lock:
+            if row is None or row[1] < time.time():
+                self.misses += 1
+                return None
+            self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, key, value):
+        conn = self._connect()
+        conn.execute(
+            f'INSERT OR REPLACE INTO cache_entries (key, value, expires_at) VALUES ({self.VERSIONED_KEY}, ?, ?)',
+            (self.namespace, self.namespace, str(key), json.dumps(value), time.time() + self.ttl)
+        )
+        with self.lock:
+            self.sets += 1
+            purge = self.sets % self.PURGE_EVERY == 0
+        if purge:
+            self._purge(conn)
+
+    def delete(self, key):
+        self._connect().execute(
+            f'DELETE FROM cache_entries WHERE key = {self.VERSIONED_KEY}',
+            (self.namespace, self.namespace, str(key))
+        )
+
+    def clear(self):
+        """Invalidate the whole namespace for every worker"""
+        self._connect().execute(
+            'INSERT INTO cache_generations (namespace, generation) VALUES (?, 1) '
+            'ON CONFLICT (namespace) DO UPDATE SET generation = generation + 1',
+            (self.namespace,)
+        )
+
+    def _purge(self, conn):
+        """Drop expired rows, then the soonest-expiring ones beyond maxsize"""
+        conn.execute('DELETE FROM cache_entries WHERE expires_at < ?', (time.time(),))
+        conn.execute(
+            'DELETE FROM cache_entries WHERE key IN (SELECT key FROM cache_entries '
+            'WHERE key LIKE ? ORDER BY expires_at DESC LIMIT -1 OFFSET ?)',
+            (f'{self.namespace}:%', self.maxsize)
+        )
+
+    def stats(self):
+        # Entries from older generations are dead weight until purged; count live ones
+        size = self._connect().execute(
+            f"SELECT count(*) FROM cache_entries WHERE key LIKE {self.VERSIONED_KEY} || '%'",
+            (self.namespace, self.namespace, '')
+        ).fetchone()[0]
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'backend': 'sqlite',
+                'size': size,
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else None
+            }
+
+
+def default_cache_path(config):
+    """A cache file in the temp dir for this app's database"""
+    url = make_url(config['SQLALCHEMY_DATABASE_URI'])
+    if url.get_backend_name() == 'sqlite' and url.database and url.database != ':memory:':
+        url = url.set(database=os.path.abspath(url.database))
+    database = hashlib.sha1(url.render_as_string().encode()).hexdigest()[:16]
+    return os.path.join(tempfile.gettempdir(), f'college-portal-cache-{database}.sqlite3')
+
+
+def make_cache(config, namespace, maxsize, ttl):
+    """Build the cache backend selected by CACHE_BACKEND"""
+    backend = config['CACHE_BACKEND']
+    if backend == 'sqlite':
+        path = config['CACHE_SQLITE_PATH'] or default_cache_path(config)
+        return SQLiteCache(path, namespace, maxsize, ttl)
+    if backend == 'local':
+        return LRUCache(maxsize, ttl)
+    raise ValueError(f'Unknown CACHE_BACKEND: {backend}')
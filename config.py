@@ -12,10 +12,30 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URI', 'sqlite:///portal.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
+    # SQLite profile: pooled connections, WAL and tuning pragmas (ignored for other databases)
+    SQLITE_PROFILE = os.environ.get('SQLITE_PROFILE', 'True').lower() == 'true'
+    SQLITE_POOL_SIZE = int(os.environ.get('SQLITE_POOL_SIZE', 5))
+    SQLITE_BUSY_TIMEOUT = int(os.environ.get('SQLITE_BUSY_TIMEOUT', 5000))  # ms to wait for the write lock
+    SQLITE_MMAP_SIZE = int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))  # bytes
+    SQLITE_CACHE_SIZE = int(os.environ.get('SQLITE_CACHE_SIZE', -64000))  # negative = KiB
+    # Queue write transactions on a per-process lock instead of SQLite's busy handler
+    SQLITE_SINGLE_WRITER = os.environ.get('SQLITE_SINGLE_WRITER', 'False').lower() == 'true'
+    
     # WhatsApp Configuration (Twilio)
     TWILIO_ACCOUNT_SID = os.environ.get('TWILIO_ACCOUNT_SID', '')
     TWILIO_AUTH_TOKEN = os.environ.get('TWILIO_AUTH_TOKEN', '')
     TWILIO_PHONE_NUMBER = os.environ.get('TWILIO_PHONE_NUMBER', '')
+    TWILIO_WHATSAPP_NUMBER = os.environ.get('TWILIO_WHATSAPP_NUMBER', 'whatsapp:+14155238886')  # Twilio sandbox number
+    
+    # WhatsApp delivery queue
+    WHATSAPP_TRANSPORT = os.environ.get('WHATSAPP_TRANSPORT', 'auto')  # auto, twilio, log, fake
+    NOTIFICATION_WORKER = os.environ.get('NOTIFICATION_WORKER', 'True').lower() == 'true'
+    NOTIFICATION_POLL_INTERVAL = float(os.environ.get('NOTIFICATION_POLL_INTERVAL', 2))
+    NOTIFICATION_MAX_ATTEMPTS = int(os.environ.get('NOTIFICATION_MAX_ATTEMPTS', 5))
+    NOTIFICATION_RETRY_BASE = float(os.environ.get('NOTIFICATION_RETRY_BASE', 5))  # seconds, doubled per attempt
+    # Hold messages this many seconds so ones to the same phone go out as one digest (0 = off)
+    NOTIFICATION_COALESCE_WINDOW = float(os.environ.get('NOTIFICATION_COALESCE_WINDOW', 0))
+    NOTIFICATION_DIGEST_MAX = int(os.environ.get('NOTIFICATION_DIGEST_MAX', 10))
     
     # Admin WhatsApp numbers (comma-separated)
     ADMIN_WHATSAPP = os.environ.get('ADMIN_WHATSAPP', '+919380126330')
@@ -28,6 +48,59 @@ class Config:
     STATIONARY_SHOP = os.environ.get('STATIONARY_SHOP', '+919380126330')
     SECURITY_OFFICE = os.environ.get('SECURITY_OFFICE', '+919380126330')
     
+    # Order status history: 'sync' (written with the change) or 'buffered' (group-committed in the background)
+    AUDIT_LOG_MODE = os.environ.get('AUDIT_LOG_MODE', 'sync')
+    AUDIT_BATCH_SIZE = int(os.environ.get('AUDIT_BATCH_SIZE', 500))
+    AUDIT_FLUSH_INTERVAL = float(os.environ.get('AUDIT_FLUSH_INTERVAL', 0.05))  # seconds
+    
+    # Password hashing: pbkdf2_sha256 or scrypt; legacy SHA-256 hashes upgrade on login
+    PASSWORD_HASHER = os.environ.get('PASSWORD_HASHER', 'pbkdf2_sha256')
+    PASSWORD_PBKDF2_ITERATIONS = int(os.environ.get('PASSWORD_PBKDF2_ITERATIONS', 260000))
+    PASSWORD_SCRYPT_N = int(os.environ.get('PASSWORD_SCRYPT_N', 2 ** 14))
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', os.cpu_count() or 1))
+    PASSWORD_HASH_QUEUE = int(os.environ.get('PASSWORD_HASH_QUEUE', 8))  # waiting jobs before 503
+    
+    # Bulk student import (flask import-students, POST /api/students/import)
+    IMPORT_BATCH_SIZE = int(os.environ.get('IMPORT_BATCH_SIZE', 500))  # rows per insert transaction
+    IMPORT_HASH_PROCESSES = int(os.environ.get('IMPORT_HASH_PROCESSES', os.cpu_count() or 1))
+    
+    # Archive of finished orders (flask archive-orders); list endpoints read it for ?from=/?to= ranges
+    ARCHIVE_DIR = os.environ.get('ARCHIVE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'archive'))
+    ARCHIVE_AFTER_DAYS = int(os.environ.get('ARCHIVE_AFTER_DAYS', 90))
+    ARCHIVE_BATCH_SIZE = int(os.environ.get('ARCHIVE_BATCH_SIZE', 1000))  # orders per transaction
+    
+    # Caching: 'local' (per worker process) or 'sqlite' (shared by all workers on the host)
+    CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'local')
+    CACHE_SQLITE_PATH = os.environ.get('CACHE_SQLITE_PATH', '')  # defaults to a temp file per database
+    
+    # Student profile cache
+    STUDENT_CACHE_SIZE = int(os.environ.get('STUDENT_CACHE_SIZE', 4096))
+    STUDENT_CACHE_TTL = float(os.environ.get('STUDENT_CACHE_TTL', 300))  # seconds
+    
+    # Login throttling (token buckets, per worker process)
+    LOGIN_ID_BURST = int(os.environ.get('LOGIN_ID_BURST', 10))
+    LOGIN_ID_PER_MINUTE = float(os.environ.get('LOGIN_ID_PER_MINUTE', 5))
+    LOGIN_IP_BURST = int(os.environ.get('LOGIN_IP_BURST', 30))
+    LOGIN_IP_PER_MINUTE = float(os.environ.get('LOGIN_IP_PER_MINUTE', 60))
+    # Proxies in front of the app whose X-Forwarded-For / -Proto / -Host are
+    # trusted; 0 keys the per-IP bucket on the socket address
+    PROXY_FIX_HOPS = int(os.environ.get('PROXY_FIX_HOPS', 0))
+    
+    # Server-Sent Events: clients reconnect (resuming from Last-Event-ID) after each stream ends
+    EVENT_STREAM_TIMEOUT = float(os.environ.get('EVENT_STREAM_TIMEOUT', 30))
+    EVENT_POLL_INTERVAL = float(os.environ.get('EVENT_POLL_INTERVAL', 1))
+    # Open streams per worker process; more are answered 204 (gunicorn.conf.py sizes this to its threads)
+    EVENT_STREAM_LIMIT = int(os.environ.get('EVENT_STREAM_LIMIT', 2))
+    
+    # Servers start the background threads themselves (gunicorn.conf.py, python app.py), so CLI
+    # commands and scripts don't; set True to start them in create_app() anyway (e.g. flask run)
+    BACKGROUND_THREADS = os.environ.get('BACKGROUND_THREADS', 'False').lower() == 'true'
+    
+    # Warm-up before a server worker takes traffic: load the WhatsApp client, open pooled
+    # connections, compile hot queries (never run for CLI commands)
+    WARMUP = os.environ.get('WARMUP', 'True').lower() == 'true'
+    WARMUP_CONNECTIONS = int(os.environ.get('WARMUP_CONNECTIONS', 2))
+    
     # Application settings
     DEBUG = os.environ.get('DEBUG', 'True').lower() == 'true'
     PORT = int(os.environ.get('PORT', 5000))
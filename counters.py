@@ -0,0 +1,103 @@
+"""
+Incrementally maintained counters for the dashboard
+
+The create/update views call these inside their own transaction, so a counter
+changes together with the row it counts and the dashboard becomes a handful of
+primary-key reads. reconcile_counters() rebuilds everything from the source
+tables if the two ever drift.
+
+Counter names: 'status:<status>' and 'created:<YYYY-MM-DD>' per order service,
+plus ('students', 'total').
+"""
+from collections import Counter
+
+from sqlalchemy.exc import IntegrityError
+
+from models import db, Student, Order, ArchivedOrder, ServiceCounter
+
+counters = ServiceCounter.__table__
+
+
+def upsert_increment(table, key, column, delta):
+    """Add delta to column of the row matching key, creating the row if needed
+
+    key maps primary-key column names to values; a new row starts at delta.
+    """
+    increment = (table.update()
+                 .where(*(table.c[name] == value for name, value in key.items()))
+                 .values({column: table.c[column] + delta}))
+    if db.session.execute(increment).rowcount:
+        return
+    try:
+        with db.session.begin_nested():
+            db.session.execute(table.insert().values({**key, column: delta}))
+    except IntegrityError:
+        # A concurrent transaction created the row first
+        db.session.execute(increment)
+
+
+def bump(service, name, delta=1):
+    """Add delta to a counter within the current session transaction"""
+    upsert_increment(counters, {'service': service, 'name': name}, 'count', delta)
+
+
+def order_created(service, order):
+    orders_created([(service, order)])
+
+
+def orders_created(created):
+    """Count a batch of (service, order) pairs with one bump per distinct counter"""
+    totals = Counter()
+    for service, order in created:
+        totals[(service, f'status:{order.status}')] += 1
+        totals[(service, f'created:{order.created_at.date().isoformat()}')] += 1
+    for (service, name), delta in totals.items():
+        bump(service, name, delta)
+
+
+def status_changed(service, old_status, new_status):
+    if old_status != new_status:
+        bump(service, f'status:{old_status}', -1)
+        bump(service, f'status:{new_status}')
+
+
+def student_created():
+    bump('students', 'total')
+
+
+def read_counters(keys):
+    """Return {(service, name): count} for the given keys, defaulting to 0"""
+    rows = db.session.execute(
+        db.select(counters.c.service, counters.c.name, counters.c.count)
+        .where(db.tuple_(counters.c.service, counters.c.name).in_(keys))
+    )
+    values = dict.fromkeys(keys, 0)
+    values.update({(row.service, row.name): row.count for row in rows})
+    return values
+
+
+def reconcile_counters(conn):
+    """Recompute every counter from the source tables; returns the row count"""
+    rows = [{
+        'service': 'students',
+        'name': 'total',
+        'count': conn.execute(db.select(db.func.count()).select_from(Student.__table__)).scalar()
+    }]
+    # Archived orders still count: they are finished, not gone
+    totals = Counter()
+    for table in (Order.__table__, ArchivedOrder.__table__):
+        by_status = (db.select(table.c.service, table.c.status, db.func.count())
+                     .group_by(table.c.service, table.c.status))
+        for service, status, count in conn.execute(by_status):
+            totals[(service, f'status:{status}')] += count
+        day = db.func.date(table.c.created_at)
+        by_day = (db.select(table.c.service, day, db.func.count())
+                  .where(table.c.created_at.isnot(None))
+                  .group_by(table.c.service, day))
+        for service, created, count in conn.execute(by_day):
+            totals[(service, f'created:{created}')] += count
+    rows += [{'service': service, 'name': name, 'count': count} for (service, name), count in totals.items()]
+
+    conn.execute(counters.delete())
+    conn.execute(counters.insert(), rows)
+    return len(rows)
@@ -255,7 +255,7 @@ def print_render_deployment_instructions():
      * Name: college-portal
      * Environment: Python 3
      * Build Command: pip install -r requirements.txt
-     * Start Command: gunicorn app:app --bind 0.0.0.0:$PORT
+     * Start Command: gunicorn -c gunicorn.conf.py app:app
      * Plan: Free
 
 3. Create PostgreSQL Database:
@@ -0,0 +1,96 @@
+"""
+Order event stream for College Portal
+
+The create/update views append an OrderEvent row in the same transaction as the
+change itself. /api/events tails that table as Server-Sent Events: streams in
+the committing process are woken immediately, streams in other worker
+processes pick the row up on their next poll. Event ids double as SSE ids, so
+a reconnecting EventSource resumes from Last-Event-ID without gaps.
+"""
+import json
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import event as sa_event
+from sqlalchemy.orm import Session
+
+from models import db, OrderEvent
+
+HEARTBEAT_INTERVAL = 15  # seconds between keep-alive comments
+
+_committed = threading.Condition()
+
+
+def emit(kind, service, order):
+    """Record an event for order in the current transaction"""
+    emit_many(kind, [(service, order)])
+
+
+def emit_many(kind, changed):
+    """Record one event per (service, order) pair with a single executemany"""
+    db.session.execute(OrderEvent.__table__.insert(), [{
+        'kind': kind,
+        'service': service,
+        'order_id': order.id,
+        'student_id': order.student_id,
+        'status': order.status,
+        'created_at': datetime.utcnow()
+    } for service, order in changed])
+    db.session.info['order_events'] = True
+
+
+@sa_event.listens_for(Session, 'after_commit')
+def _wake_streams(session):
+    if session.info.pop('order_events', False):
+        with _committed:
+            _committed.notify_all()
+
+
+@sa_event.listens_for(Session, 'after_rollback')
+def _forget_events(session):
+    session.info.pop('order_events', None)
+
+
+def latest_event_id():
+    return db.session.query(db.func.max(OrderEvent.id)).scalar() or 0
+
+
+def format_event(event):
+    return f"id: {event.id}\nevent: {event.kind}\ndata: {json.dumps(event.to_dict())}\n\n"
+
+
+def stream_events(last_id, timeout, poll_interval, student_id=None, service=None):
+    """Yield SSE frames for events after last_id, for one student or one service"""
+    query = OrderEvent.query
+    if student_id is not None:
+        query = query.filter(OrderEvent.student_id == student_id)
+    if service is not None:
+        query = query.filter(OrderEvent.service == service)
+
+    yield "retry: 3000\n\n"
+    deadline = time.monotonic() + timeout
+    last_sent = time.monotonic()
+    while time.monotonic() < deadline:
+        events = query.filter(OrderEvent.id > last_id).order_by(OrderEvent.id).limit(100).all()
+        # Don't hold a connection (or an SQLite read lock) while idle
+        db.session.close()
+        for event in events:
+            last_id = event.id
+            yield format_event(event)
+        if events:
+            last_sent = time.monotonic()
+            continue
+        if time.monotonic() - last_sent >= HEARTBEAT_INTERVAL:
+            last_sent = time.monotonic()
+            yield ": keep-alive\n\n"
+        with _committed:
+            _committed.wait(min(poll_interval, max(deadline - time.monotonic(), 0)))
+
+
+def prune_events(max_age):
+    """Delete events older than max_age (a timedelta); returns the row count"""
+    cutoff = datetime.utcnow() - max_age
+    deleted = OrderEvent.query.filter(OrderEvent.created_at < cutoff).delete(synchronize_session=False)
+    db.session.commit()
+    return deleted
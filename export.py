@@ -0,0 +1,91 @@
+"""
+Streaming order exports for College Portal
+
+Rows are read from a server-side cursor in chunks of YIELD_PER and written
+out as they arrive, so memory stays flat however many orders match.
+"""
+import csv
+import io
+import json
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import select
+
+from models import db, Order, Student
+
+YIELD_PER = 1000
+
+FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson'
+}
+
+
+class InvalidExportFilter(ValueError):
+    """A date or format argument that can't be used"""
+
+
+def parse_day(value):
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise InvalidExportFilter(f'Invalid date: {value} (expected YYYY-MM-DD)')
+
+
+def export_columns(service):
+    """Column order of a service's export, matching its old table layout"""
+    return ['id', 'student_id', *service.field_names, 'status', 'created_at', 'updated_at', 'student_name']
+
+
+def export_query(service, start=None, end=None, statuses=None):
+    """Core select of a service's orders plus student_name, oldest first
+
+    start and end are dates, both inclusive.
+    """
+    orders = Order.__table__
+    stmt = (select(*orders.columns, Student.name.label('student_name'))
+            .select_from(orders.outerjoin(Student.__table__, orders.c.student_id == Student.id))
+            .where(orders.c.service == service.name))
+    if start:
+        stmt = stmt.where(orders.c.created_at >= datetime.combine(start, datetime.min.time()))
+    if end:
+        stmt = stmt.where(orders.c.created_at < datetime.combine(end + timedelta(days=1), datetime.min.time()))
+    if statuses:
+        stmt = stmt.where(orders.c.status.in_(statuses))
+    return stmt.order_by(orders.c.created_at, orders.c.id)
+
+
+def _value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _values(row, columns):
+    record = dict(row._mapping)
+    record.update(record.pop('payload') or {})
+    return [_value(record.get(name)) for name in columns]
+
+
+def stream_rows(stmt, fmt, columns):
+    """Yield the encoded export in chunks of up to YIELD_PER rows"""
+    result = db.session.execute(stmt, execution_options={'stream_results': True}).yield_per(YIELD_PER)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if fmt == 'csv' else None
+    if writer:
+        writer.writerow(columns)
+    try:
+        for rows in result.partitions():
+            for row in rows:
+                if writer:
+                    writer.writerow(_values(row, columns))
+                else:
+                    buffer.write(json.dumps(dict(zip(columns, _values(row, columns)))))
+                    buffer.write('\n')
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        if fmt == 'csv' and buffer.tell():
+            yield buffer.getvalue()  # header of an empty export
+    finally:
+        result.close()
@@ -1,11 +1,84 @@
 """
 Gunicorn configuration for College Portal
+
+    gunicorn -c gunicorn.conf.py app:app
+
+Worker model (environment variables):
+
+    GUNICORN_WORKER_CLASS  gthread (default) or sync
+    WEB_CONCURRENCY        worker processes; default 2 x CPUs + 1 for sync,
+                           CPUs + 1 for gthread, where CPUs is the
+                           container's CPU quota (cgroup cpu.max) when that
+                           is lower than the CPUs the process may run on
+    GUNICORN_THREADS       threads per gthread worker (default 4); keep it at
+                           or below SQLITE_POOL_SIZE
+    GUNICORN_PRELOAD       load the app once in the master and fork workers
+                           from it (default True)
+
+gthread is the default because /api/events holds a request open for up to
+EVENT_STREAM_TIMEOUT seconds, which would tie up a whole sync worker. Unless
+EVENT_STREAM_LIMIT is set, each gthread worker serves at most half its
+threads as event streams, so the rest always take API requests; sync workers
+serve none.
+
+With preloading, create_app() - and with it schema setup and serializer
+compilation - runs once, and workers share the loaded code copy-on-write.
+The master must not hand database connections or threads to its children,
+so pre_fork empties the connection pool. post_fork starts the background
+threads and runs the warm-up (WARMUP) in each worker; create_app() itself
+leaves both alone, so CLI commands never start them.
 """
+import math
 import os
 
+CGROUP_QUOTAS = [
+    ("/sys/fs/cgroup/cpu.max",),  # cgroup v2: "<quota|max> <period>"
+    ("/sys/fs/cgroup/cpu/cpu.cfs_quota_us", "/sys/fs/cgroup/cpu/cpu.cfs_period_us"),  # v1, -1 = none
+]
+
+
+def read_text(path):
+    with open(path) as f:
+        return f.read()
+
+
+def cpu_quota():
+    """CPUs' worth of time the cgroup may use per period, or None if unlimited"""
+    for paths in CGROUP_QUOTAS:
+        try:
+            values = " ".join(read_text(path) for path in paths).split()
+        except OSError:
+            continue
+        try:
+            quota, period = values
+            return None if quota in ("max", "-1") else int(quota) / int(period)
+        except (ValueError, ZeroDivisionError):
+            return None
+    return None
+
+
+def cpu_count():
+    try:
+        count = len(os.sched_getaffinity(0))  # CPUs this process may run on
+    except AttributeError:
+        count = os.cpu_count() or 1
+    quota = cpu_quota()
+    if quota:
+        count = min(count, max(1, math.ceil(quota)))
+    return count
+
+
 bind = "0.0.0.0:" + os.environ.get("PORT", "5000")
-workers = 2
-timeout = 120
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "gthread")
+if worker_class == "gthread":
+    threads = int(os.environ.get("GUNICORN_THREADS", 4))
+    workers = int(os.environ.get("WEB_CONCURRENCY", cpu_count() + 1))
+else:
+    workers = int(os.environ.get("WEB_CONCURRENCY", cpu_count() * 2 + 1))
+# Read by config.py when the app is imported
+os.environ.setdefault("EVENT_STREAM_LIMIT", str(threads // 2 if worker_class == "gthread" else 0))
+preload_app = os.environ.get("GUNICORN_PRELOAD", "True").lower() == "true"
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 120))
 keepalive = 5
 accesslog = "-"
 errorlog = "-"
@@ -13,3 +86,18 @@ loglevel = "info"
 capture_output = True
 enable_stdio_inheritance = True
 
+
+def pre_fork(server, worker):
+    if preload_app:
+        from models import db
+        app = server.app.wsgi()
+        with app.app_context():
+            db.engine.dispose()
+
+
+def post_fork(server, worker):
+    # Without preloading this is where the worker loads the app
+    app = server.app.wsgi()
+    app.start_background()
+    if app.config['WARMUP']:
+        app.warm_up()
@@ -0,0 +1,190 @@
+"""
+Bulk student import for College Portal
+
+Streams CSV or NDJSON rows, validates them, rejects duplicates (against the
+database and earlier rows of the same file) with set lookups, hashes
+passwords in a process pool and inserts in batched transactions.
+
+The pool's processes come from a fork server rather than forking the caller,
+which may be a request thread of a multi-threaded worker holding locks and
+pooled connections. A batch that still hits a unique constraint (a student
+registered while the file was being read) is retried row by row, and only
+the conflicting rows are reported.
+"""
+import codecs
+import csv
+import io
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from sqlalchemy.exc import IntegrityError
+
+from counters import bump
+from models import db, Student
+from versions import bump_versions
+
+REQUIRED_FIELDS = ['student_id', 'name', 'email', 'phone', 'password',
+                   'emergency_contact', 'hostel_room', 'blood_group']
+
+MAX_REPORTED_ERRORS = 1000
+
+
+def pool_context():
+    if 'forkserver' not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('spawn')
+    context = multiprocessing.get_context('forkserver')
+    # The hashers are all the children need; the default would import __main__
+    context.set_forkserver_preload(['passwords'])
+    return context
+
+
+def detect_format(filename, content_type=None):
+    """'csv' or 'ndjson' from a file name or content type (CSV by default)"""
+    name = (filename or '').lower()
+    if name.endswith(('.ndjson', '.jsonl')) or 'ndjson' in (content_type or ''):
+        return 'ndjson'
+    return 'csv'
+
+
+def decode_lines(stream, bad_lines):
+    """Decode a binary stream line by line as UTF-8, noting the lines that aren't"""
+    for line_no, raw in enumerate(stream, start=1):
+        if line_no == 1 and raw.startswith(codecs.BOM_UTF8):
+            raw = raw[len(codecs.BOM_UTF8):]
+        try:
+            yield raw.decode('utf-8')
+        except UnicodeDecodeError:
+            bad_lines.add(line_no)
+            yield raw.decode('utf-8', 'replace')
+
+
+def read_rows(stream, fmt):
+    """Yield (line number, row dict or None) from a binary or text stream
+
+    Malformed rows, including ones with bytes that aren't UTF-8, come out as
+    None so the importer reports them and carries on with the rest.
+    """
+    bad_lines = set()
+    lines = stream if isinstance(stream, io.TextIOBase) else decode_lines(stream, bad_lines)
+    if fmt == 'ndjson':
+        for line_no, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = None
+            yield line_no, row if isinstance(row, dict) and line_no not in bad_lines else None
+    else:
+        reader = csv.DictReader(lines)
+        last = 0
+        while True:
+            try:
+                row = next(reader)
+                line_no = reader.line_num
+            except StopIteration:
+                break
+            except csv.Error:
+                row = None
+                line_no = reader.line_num + 1  # not counted yet when the reader gives up
+            # A quoted field can span lines; any bad line spoils the row
+            bad = not bad_lines.isdisjoint(range(last + 1, line_no + 1))
+            last = line_no
+            yield line_no, None if bad else row
+
+
+class StudentImporter:
+    """Validates and inserts students; call run() with read_rows() output"""
+
+    def __init__(self, hasher, batch_size=500, processes=None):
+        self.hasher = hasher
+        self.batch_size = batch_size
+        self.processes = processes or os.cpu_count() or 1
+        self.imported = 0
+        self.failed = 0
+        self.errors = []
+
+    def error(self, line_no, message):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line_no, 'error': message})
+
+    def run(self, rows):
+        started = time.perf_counter()
+        existing = db.session.query(Student.student_id, Student.email, Student.phone).all()
+        seen = {
+            'student_id': {r.student_id for r in existing},
+            'email': {r.email.lower() for r in existing},
+            'phone': {r.phone for r in existing}
+        }
+        labels = {'student_id': 'Student ID', 'email': 'Email', 'phone': 'Phone number'}
+
+        with ProcessPoolExecutor(max_workers=self.processes, mp_context=pool_context()) as pool:
+            batch = []
+            for line_no, row in rows:
+                if row is None:
+                    self.error(line_no, 'Malformed row')
+                    continue
+                values = {f: str(row.get(f) or '').strip() for f in REQUIRED_FIELDS}
+                missing = [f for f in REQUIRED_FIELDS if not values[f]]
+                if missing:
+                    self.error(line_no, f'{missing[0]} is required')
+                    continue
+                keys = {'student_id': values['student_id'],
+                        'email': values['email'].lower(),
+                        'phone': values['phone']}
+                duplicate = next((f for f in keys if keys[f] in seen[f]), None)
+                if duplicate:
+                    self.error(line_no, f'{labels[duplicate]} already registered')
+                    continue
+                for field, key in keys.items():
+                    seen[field].add(key)
+                batch.append((line_no, values))
+                if len(batch) >= self.batch_size:
+                    self.insert(pool, batch)
+                    batch = []
+            if batch:
+                self.insert(pool, batch)
+
+        elapsed = time.perf_counter() - started
+        return {
+            'imported': self.imported,
+            'failed': self.failed,
+            'errors': self.errors,
+            'errors_truncated': self.failed > len(self.errors),
+            'seconds': round(elapsed, 3),
+            'rows_per_second': round((self.imported + self.failed) / elapsed, 1) if elapsed else None
+        }
+
+    def insert(self, pool, batch):
+        """Hash a batch's passwords in parallel and insert it in one transaction"""
+        chunksize = max(1, len(batch) // (self.processes * 4))
+        hashes = pool.map(self.hasher.hash, [v['password'] for _, v in batch], chunksize=chunksize)
+        for (_, values), hashed in zip(batch, hashes):
+            values['password'] = hashed
+        try:
+            db.session.execute(Student.__table__.insert(), [values for _, values in batch])
+            inserted = len(batch)
+        except IntegrityError:
+            db.session.rollback()
+            inserted = self.insert_each(batch)
+        if inserted:
+            bump('students', 'total', inserted)
+            bump_versions('students')
+        db.session.commit()
+        self.imported += inserted
+
+    def insert_each(self, batch):
+        """Insert rows one savepoint at a time, reporting the ones that conflict"""
+        inserted = 0
+        for line_no, values in batch:
+            try:
+                with db.session.begin_nested():
+                    db.session.execute(Student.__table__.insert(), values)
+                inserted += 1
+            except IntegrityError:
+                self.error(line_no, 'Student ID, email or phone number already registered')
+        return inserted
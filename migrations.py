@@ -0,0 +1,216 @@
+"""
+Versioned schema migrations for College Portal
+
+db.create_all() only creates missing tables, so changes to existing tables
+(new indexes, columns) are applied here. Each migration runs once, in its own
+transaction, and is recorded in the schema_migrations table.
+
+ensure_schema() runs both at startup. It stores a fingerprint of the models
+and the migration list once the database is up to date, so a process that
+finds a matching fingerprint skips all DDL with a single-row read.
+"""
+import hashlib
+import json
+from datetime import date, datetime
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.exc import IntegrityError, OperationalError, ProgrammingError
+from sqlalchemy.schema import CreateIndex
+
+from counters import reconcile_counters
+from models import db, Order, OrderEvent, RequestStatus, Student, VersionStamp
+from services import SERVICES
+
+schema_migrations = db.Table(
+    'schema_migrations',
+    db.Column('version', db.Integer, primary_key=True),
+    db.Column('description', db.String(200), nullable=False),
+    db.Column('applied_at', db.DateTime, nullable=False)
+)
+
+# One row: the schema_fingerprint() the database was last brought up to
+schema_state = db.Table(
+    'schema_state',
+    db.Column('id', db.Integer, primary_key=True),
+    db.Column('fingerprint', db.String(64), nullable=False),
+    db.Column('updated_at', db.DateTime, nullable=False)
+)
+
+
+def create_indexes(conn, *names):
+    """Create model-declared indexes by name, skipping ones that already exist"""
+    indexes = {index.name: index for table in db.metadata.tables.values() for index in table.indexes}
+    for name in names:
+        conn.execute(CreateIndex(indexes[name], if_not_exists=True))
+
+
+# Per-service order tables, replaced by the shared orders table in migration 4
+LEGACY_ORDER_TABLES = {
+    'outing': 'outing_requests',
+    'xerox': 'xerox_orders',
+    'mess': 'mess_orders',
+    'fivestar': 'fivestar_orders',
+    'ccd': 'ccd_orders',
+    'stationary': 'stationary_orders'
+}
+
+
+def legacy_tables(conn):
+    """Reflect the per-service order tables that exist in this database"""
+    inspector = sa_inspect(conn)
+    metadata = db.MetaData()
+    return {service: db.Table(name, metadata, autoload_with=conn)
+            for service, name in LEGACY_ORDER_TABLES.items() if inspector.has_table(name)}
+
+
+def index_order_access_paths(conn):
+    for table in legacy_tables(conn).values():
+        for index in [db.Index(f'ix_{table.name}_student_created', table.c.student_id, table.c.created_at),
+                      db.Index(f'ix_{table.name}_status', table.c.status),
+                      db.Index(f'ix_{table.name}_created', table.c.created_at)]:
+            conn.execute(CreateIndex(index, if_not_exists=True))
+    create_indexes(conn, 'ix_request_statuses_request')
+
+
+def _json_value(value):
+    return value.isoformat() if isinstance(value, (date, datetime)) else value
+
+
+def consolidate_orders(conn, batch_size=1000):
+    """Copy every per-service order table into orders and re-point references
+
+    Orders get new ids (the old ones overlap across tables), so status history
+    and events are updated to match and every list version is bumped so no
+    client revalidates a cached list against the old ids. The old tables are
+    left in place, no longer used, and can be dropped once the copy is checked.
+    """
+    orders = Order.__table__
+    next_id = (conn.execute(db.select(db.func.max(orders.c.id))).scalar() or 0) + 1
+    moved = []
+    for service, table in legacy_tables(conn).items():
+        fields = SERVICES[service].field_names
+        rows = []
+        for row in conn.execute(db.select(table).order_by(table.c.id)):
+            rows.append({
+                'id': next_id,
+                'service': service,
+                'student_id': row.student_id,
+                'status': row.status,
+                'payload': {name: _json_value(row._mapping[name]) for name in fields},
+                'created_at': row.created_at,
+                'updated_at': row.updated_at
+            })
+            moved.append({'ref_service': service, 'old_id': row.id, 'new_id': next_id})
+            next_id += 1
+            if len(rows) >= batch_size:
+                conn.execute(orders.insert(), rows)
+                rows = []
+        if rows:
+            conn.execute(orders.insert(), rows)
+    if moved and conn.dialect.name == 'postgresql':
+        # Explicit ids don't advance the serial sequence new orders draw from
+        conn.execute(db.text("SELECT setval(pg_get_serial_sequence('orders', 'id'), max(id)) FROM orders"))
+
+    if moved:
+        # Negate while remapping so a new id that equals an old id still to
+        # be remapped is not moved twice, then flip the sign back
+        for table, type_col, id_col in [(RequestStatus.__table__, 'request_type', 'request_id'),
+                                        (OrderEvent.__table__, 'service', 'order_id')]:
+            conn.execute(
+                table.update()
+                .where(table.c[type_col] == db.bindparam('ref_service'),
+                       table.c[id_col] == db.bindparam('old_id'))
+                .values({id_col: -db.bindparam('new_id')}),
+                moved
+            )
+            conn.execute(table.update().where(table.c[id_col] < 0).values({id_col: -table.c[id_col]}))
+
+    stamps = VersionStamp.__table__
+    conn.execute(stamps.update().values(version=stamps.c.version + 1))
+    existing = {row.scope for row in conn.execute(db.select(stamps.c.scope))}
+    scopes = ['students', *(f'service:{service}' for service in SERVICES)]
+    scopes += [f'student:{student_id}' for student_id, in conn.execute(db.select(Student.id))]
+    fresh = [{'scope': scope, 'version': 1} for scope in scopes if scope not in existing]
+    if fresh:
+        conn.execute(stamps.insert(), fresh)
+
+    reconcile_counters(conn)
+
+
+# (version, description, function) - append only, never renumber
+MIGRATIONS = [
+    (1, 'Index order tables and status history', index_order_access_paths),
+    (2, 'Backfill dashboard counters', reconcile_counters),
+    (3, 'Index student phone numbers for login', lambda conn: create_indexes(conn, 'ix_students_phone')),
+    (4, 'Move per-service order tables into orders', consolidate_orders),
+]
+
+
+def applied_versions(engine):
+    """Return the set of migration versions already applied"""
+    schema_migrations.create(engine, checkfirst=True)
+    with engine.connect() as conn:
+        return {row.version for row in conn.execute(db.select(schema_migrations.c.version))}
+
+
+def run_migrations(engine):
+    """Apply pending migrations in order; returns the versions applied"""
+    done = applied_versions(engine)
+    applied = []
+    for version, description, migrate in MIGRATIONS:
+        if version in done:
+            continue
+        try:
+            with engine.begin() as conn:
+                migrate(conn)
+                conn.execute(schema_migrations.insert().values(
+                    version=version,
+                    description=description,
+                    applied_at=datetime.utcnow()
+                ))
+        except IntegrityError:
+            # Another worker recorded this version first
+            continue
+        applied.append(version)
+    return applied
+
+
+def schema_fingerprint():
+    """Hash of every model table (columns, indexes) and migration version"""
+    tables = []
+    for table in db.metadata.sorted_tables:
+        tables.append([
+            table.name,
+            [[c.name, str(c.type), c.nullable, c.primary_key] for c in table.columns],
+            sorted([i.name, i.unique, [c.name for c in i.columns]] for i in table.indexes)
+        ])
+    versions = [version for version, _, _ in MIGRATIONS]
+    return hashlib.sha256(json.dumps([tables, versions]).encode()).hexdigest()
+
+
+def stored_fingerprint(engine):
+    try:
+        with engine.connect() as conn:
+            return conn.execute(db.select(schema_state.c.fingerprint)).scalar()
+    except (OperationalError, ProgrammingError):
+        return None  # schema_state doesn't exist yet
+
+
+def ensure_schema(engine, force=False):
+    """Create missing tables and apply pending migrations unless already current
+
+    Returns the migration versions applied, or None when the stored
+    fingerprint matched and nothing was checked.
+    """
+    fingerprint = schema_fingerprint()
+    if not force and stored_fingerprint(engine) == fingerprint:
+        return None
+    db.metadata.create_all(engine)
+    applied = run_migrations(engine)
+    try:
+        with engine.begin() as conn:
+            conn.execute(schema_state.delete())
+            conn.execute(schema_state.insert().values(id=1, fingerprint=fingerprint,
+                                                      updated_at=datetime.utcnow()))
+    except IntegrityError:
+        pass  # another worker recorded it at the same time
+    return applied
@@ -9,6 +9,9 @@ db = SQLAlchemy()
 class Student(db.Model):
     """Student model for storing student information"""
     __tablename__ = 'students'
+    __table_args__ = (
+        db.Index('ix_students_phone', 'phone'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     student_id = db.Column(db.String(50), unique=True, nullable=False)
@@ -23,12 +26,7 @@ class Student(db.Model):
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
-    outing_requests = db.relationship('OutingRequest', backref='student', lazy=True)
-    xerox_orders = db.relationship('XeroxOrder', backref='student', lazy=True)
-    mess_orders = db.relationship('MessOrder', backref='student', lazy=True)
-    fivestar_orders = db.relationship('FivestarOrder', backref='student', lazy=True)
-    ccd_orders = db.relationship('CCDOrder', backref='student', lazy=True)
-    stationary_orders = db.relationship('StationaryOrder', backref='student', lazy=True)
+    orders = db.relationship('Order', backref='student', lazy=True)
     
     def to_dict(self):
         return {
@@ -43,208 +41,150 @@ class Student(db.Model):
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
 
-class OutingRequest(db.Model):
-    """Outing request model"""
-    __tablename__ = 'outing_requests'
-    
-    id = db.Column(db.Integer, primary_key=True)
-    student_id = db.Column(db.Integer, db.ForeignKey('students.id'), nullable=False)
-    outing_date = db.Column(db.DateTime, nullable=False)
-    return_date = db.Column(db.DateTime, nullable=False)
-    reason = db.Column(db.String(50), nullable=False)
-    details = db.Column(db.Text, nullable=True)
-    emergency_contact = db.Column(db.String(20), nullable=False)
-    status = db.Column(db.String(20), default='pending')  # pending, approved, rejected
-    parent_notified = db.Column(db.Boolean, default=False)
-    security_notified = db.Column(db.Boolean, default=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
-    
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'student_id': self.student_id,
-            'student_name': self.student.name if self.student else None,
-            'outing_date': self.outing_date.isoformat() if self.outing_date else None,
-            'return_date': self.return_date.isoformat() if self.return_date else None,
-            'reason': self.reason,
-            'details': self.details,
-            'emergency_contact': self.emergency_contact,
-            'status': self.status,
-            'parent_notified': self.parent_notified,
-            'security_notified': self.security_notified,
-            'created_at': self.created_at.isoformat() if self.created_at else None
-        }
+class Order(db.Model):
+    """Order or request for any campus service
 
-class XeroxOrder(db.Model):
-    """Xerox order model"""
-    __tablename__ = 'xerox_orders'
+    Fields specific to a service live in payload, as declared in services.py.
+    """
+    __tablename__ = 'orders'
+    __table_args__ = (
+        db.Index('ix_orders_student_created', 'student_id', 'created_at'),
+        db.Index('ix_orders_service_created', 'service', 'created_at'),
+        db.Index('ix_orders_service_status', 'service', 'status'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
+    service = db.Column(db.String(50), nullable=False)  # outing, xerox, mess, etc.
     student_id = db.Column(db.Integer, db.ForeignKey('students.id'), nullable=False)
-    service_type = db.Column(db.String(50), nullable=False)
-    pages = db.Column(db.Integer, nullable=False)
-    delivery_location = db.Column(db.String(50), nullable=False)
-    instructions = db.Column(db.Text, nullable=True)
-    contact_number = db.Column(db.String(20), nullable=False)
-    status = db.Column(db.String(20), default='pending')  # pending, processing, ready, completed
+    status = db.Column(db.String(20), default='pending')
+    payload = db.Column(db.JSON, nullable=False, default=dict)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     def to_dict(self):
-        return {
+        data = {
             'id': self.id,
+            'service': self.service,
             'student_id': self.student_id,
-            'student_name': self.student.name if self.student else None,
-            'service_type': self.service_type,
-            'pages': self.pages,
-            'delivery_location': self.delivery_location,
-            'instructions': self.instructions,
-            'contact_number': self.contact_number,
-            'status': self.status,
-            'created_at': self.created_at.isoformat() if self.created_at else None
+            'student_name': self.student.name if self.student else None
         }
-
-class MessOrder(db.Model):
-    """Mess order model"""
-    __tablename__ = 'mess_orders'
-    
-    id = db.Column(db.Integer, primary_key=True)
-    student_id = db.Column(db.Integer, db.ForeignKey('students.id'), nullable=False)
-    meal_type = db.Column(db.String(20), nullable=False)
-    meal_date = db.Column(db.Date, nullable=False)
-    quantity = db.Column(db.Integer, default=1)
-    special_requests = db.Column(db.Text, nullable=True)
-    status = db.Column(db.String(20), default='pending')  # pending, confirmed, prepared, delivered
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
-    
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'student_id': self.student_id,
-            'student_name': self.student.name if self.student else None,
-            'meal_type': self.meal_type,
-            'meal_date': self.meal_date.isoformat() if self.meal_date else None,
-            'quantity': self.quantity,
-            'special_requests': self.special_requests,
+        data.update(self.payload or {})
+        data.update({
             'status': self.status,
             'created_at': self.created_at.isoformat() if self.created_at else None
-        }
+        })
+        return data
 
-class FivestarOrder(db.Model):
-    """Fivestar Restaurant order model"""
-    __tablename__ = 'fivestar_orders'
+class ArchivedOrder(db.Model):
+    """Index entry for an order moved to the cold archive (see archive.py)"""
+    __tablename__ = 'archived_orders'
+    __table_args__ = (
+        db.Index('ix_archived_orders_student_created', 'student_id', 'created_at'),
+        db.Index('ix_archived_orders_service_created', 'service', 'created_at'),
+    )
+    
+    order_id = db.Column(db.Integer, primary_key=True)  # Order.id it had while hot
+    service = db.Column(db.String(50), nullable=False)
+    student_id = db.Column(db.Integer, nullable=False)
+    status = db.Column(db.String(20), nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False)  # also picks the archive file
+
+class RequestStatus(db.Model):
+    """Model to track all request statuses"""
+    __tablename__ = 'request_statuses'
+    __table_args__ = (
+        db.Index('ix_request_statuses_request', 'request_type', 'request_id', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
-    student_id = db.Column(db.Integer, db.ForeignKey('students.id'), nullable=False)
-    category = db.Column(db.String(50), nullable=False)
-    item = db.Column(db.String(100), nullable=False)
-    quantity = db.Column(db.Integer, default=1)
-    delivery_option = db.Column(db.String(50), nullable=False)
-    instructions = db.Column(db.Text, nullable=True)
-    contact_number = db.Column(db.String(20), nullable=False)
-    status = db.Column(db.String(20), default='pending')  # pending, confirmed, preparing, ready, delivered
+    request_type = db.Column(db.String(50), nullable=False)  # outing, xerox, mess, etc.
+    request_id = db.Column(db.Integer, nullable=False)
+    status = db.Column(db.String(20), nullable=False)
+    updated_by = db.Column(db.String(100), nullable=True)
+    notes = db.Column(db.Text, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     def to_dict(self):
         return {
             'id': self.id,
-            'student_id': self.student_id,
-            'student_name': self.student.name if self.student else None,
-            'category': self.category,
-            'item': self.item,
-            'quantity': self.quantity,
-            'delivery_option': self.delivery_option,
-            'instructions': self.instructions,
-            'contact_number': self.contact_number,
+            'request_type': self.request_type,
+            'request_id': self.request_id,
             'status': self.status,
+            'updated_by': self.updated_by,
+            'notes': self.notes,
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
 
-class CCDOrder(db.Model):
-    """Cafe Coffee Day order model"""
-    __tablename__ = 'ccd_orders'
+class ServiceCounter(db.Model):
+    """Running counts per service, maintained by the order views (see counters.py)"""
+    __tablename__ = 'service_counters'
     
-    id = db.Column(db.Integer, primary_key=True)
-    student_id = db.Column(db.Integer, db.ForeignKey('students.id'), nullable=False)
-    category = db.Column(db.String(50), nullable=False)
-    item = db.Column(db.String(100), nullable=False)
-    quantity = db.Column(db.Integer, default=1)
-    size = db.Column(db.String(20), nullable=False)
-    instructions = db.Column(db.Text, nullable=True)
-    contact_number = db.Column(db.String(20), nullable=False)
-    status = db.Column(db.String(20), default='pending')  # pending, confirmed, preparing, ready, delivered
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    service = db.Column(db.String(50), primary_key=True)  # order service, or 'students'
+    name = db.Column(db.String(50), primary_key=True)  # status:<status>, created:<date>, total
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+class VersionStamp(db.Model):
+    """Change counter per cache scope, used to build list ETags (see versions.py)"""
+    __tablename__ = 'version_stamps'
     
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'student_id': self.student_id,
-            'student_name': self.student.name if self.student else None,
-            'category': self.category,
-            'item': self.item,
-            'quantity': self.quantity,
-            'size': self.size,
-            'instructions': self.instructions,
-            'contact_number': self.contact_number,
-            'status': self.status,
-            'created_at': self.created_at.isoformat() if self.created_at else None
-        }
+    scope = db.Column(db.String(80), primary_key=True)  # students, student:<id>, service:<name>
+    version = db.Column(db.Integer, nullable=False, default=0)
 
-class StationaryOrder(db.Model):
-    """Stationary shop order model"""
-    __tablename__ = 'stationary_orders'
+class OrderEvent(db.Model):
+    """Order created / status changed event, streamed to clients over SSE"""
+    __tablename__ = 'order_events'
+    __table_args__ = (
+        db.Index('ix_order_events_student', 'student_id', 'id'),
+        db.Index('ix_order_events_service', 'service', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
-    student_id = db.Column(db.Integer, db.ForeignKey('students.id'), nullable=False)
-    category = db.Column(db.String(50), nullable=False)
-    item = db.Column(db.String(100), nullable=False)
-    quantity = db.Column(db.Integer, default=1)
-    delivery_option = db.Column(db.String(50), nullable=False)
-    instructions = db.Column(db.Text, nullable=True)
-    contact_number = db.Column(db.String(20), nullable=False)
-    status = db.Column(db.String(20), default='pending')  # pending, processing, ready, completed
+    kind = db.Column(db.String(20), nullable=False)  # created, status
+    service = db.Column(db.String(50), nullable=False)
+    order_id = db.Column(db.Integer, nullable=False)
+    student_id = db.Column(db.Integer, nullable=False)
+    status = db.Column(db.String(20), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     def to_dict(self):
         return {
             'id': self.id,
+            'kind': self.kind,
+            'service': self.service,
+            'order_id': self.order_id,
             'student_id': self.student_id,
-            'student_name': self.student.name if self.student else None,
-            'category': self.category,
-            'item': self.item,
-            'quantity': self.quantity,
-            'delivery_option': self.delivery_option,
-            'instructions': self.instructions,
-            'contact_number': self.contact_number,
             'status': self.status,
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
 
-class RequestStatus(db.Model):
-    """Model to track all request statuses"""
-    __tablename__ = 'request_statuses'
+class WhatsAppMessage(db.Model):
+    """Outbound WhatsApp message waiting for, or done with, delivery"""
+    __tablename__ = 'whatsapp_outbox'
+    __table_args__ = (
+        db.Index('ix_whatsapp_outbox_due', 'status', 'next_attempt_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
-    request_type = db.Column(db.String(50), nullable=False)  # outing, xerox, mess, etc.
-    request_id = db.Column(db.Integer, nullable=False)
-    status = db.Column(db.String(20), nullable=False)
-    updated_by = db.Column(db.String(100), nullable=True)
-    notes = db.Column(db.Text, nullable=True)
+    phone = db.Column(db.String(20), nullable=False)
+    body = db.Column(db.Text, nullable=False)
+    service = db.Column(db.String(50), default='general')
+    status = db.Column(db.String(20), default='queued')  # queued, sending, sent, failed
+    attempts = db.Column(db.Integer, default=0)
+    next_attempt_at = db.Column(db.DateTime, default=datetime.utcnow)
+    last_error = db.Column(db.Text, nullable=True)
+    message_sid = db.Column(db.String(64), nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime, nullable=True)
     
     def to_dict(self):
         return {
             'id': self.id,
-            'request_type': self.request_type,
-            'request_id': self.request_id,
+            'phone': self.phone,
+            'service': self.service,
             'status': self.status,
-            'updated_by': self.updated_by,
-            'notes': self.notes,
-            'created_at': self.created_at.isoformat() if self.created_at else None
+            'attempts': self.attempts,
+            'last_error': self.last_error,
+            'message_sid': self.message_sid,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'sent_at': self.sent_at.isoformat() if self.sent_at else None
         }
-
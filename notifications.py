@@ -0,0 +1,228 @@
+"""
+WhatsApp delivery queue for College Portal
+
+Request handlers only insert a row into whatsapp_outbox. A background worker
+per process claims due rows, sends them through one long-lived transport and
+retries failures with exponential backoff, recording the outcome on the row.
+Messages to the same phone can be held for a short window and sent together
+as one digest.
+"""
+import threading
+from datetime import datetime, timedelta
+
+from models import db, WhatsAppMessage
+
+# How long a claimed message may stay in 'sending' before another worker
+# assumes the sender died and picks it up again
+CLAIM_TIMEOUT = timedelta(minutes=2)
+
+# Each message becomes one line of a digest, cut to this many characters so a
+# full digest stays under WhatsApp's 1600 character limit
+DIGEST_LINE_LENGTH = 140
+
+
+def format_whatsapp_number(phone):
+    """Normalize a phone number to the whatsapp:+<number> form"""
+    if not phone.startswith('+'):
+        phone = f'+91{phone}'  # Assuming Indian numbers, adjust as needed
+    return f'whatsapp:{phone}'
+
+
+class LogTransport:
+    """Prints messages instead of sending them (Twilio not configured)"""
+
+    def send(self, phone, body):
+        print(f"WhatsApp message to {phone}: {body}")
+        return None
+
+
+class FakeTransport:
+    """Records messages in memory; fails the first `fail_times` sends"""
+
+    def __init__(self, fail_times=0):
+        self.fail_times = fail_times
+        self.sent = []
+
+    def send(self, phone, body):
+        if self.fail_times:
+            self.fail_times -= 1
+            raise RuntimeError('Simulated delivery failure')
+        self.sent.append((phone, body))
+        return f'FAKE{len(self.sent):06d}'
+
+
+class TwilioTransport:
+    """Sends through Twilio, reusing one client (and its HTTP connection pool)"""
+
+    def __init__(self, account_sid, auth_token, from_number):
+        self.account_sid = account_sid
+        self.auth_token = auth_token
+        self.from_number = from_number
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            from twilio.rest import Client
+            self._client = Client(self.account_sid, self.auth_token)
+        return self._client
+
+    def warm_up(self):
+        """Import the SDK and build the client now instead of on the first send"""
+        self.client
+
+    def send(self, phone, body):
+        message = self.client.messages.create(
+            from_=self.from_number,
+            body=body,
+            to=format_whatsapp_number(phone)
+        )
+        return message.sid
+
+
+def make_transport(config):
+    """Pick a transport from WHATSAPP_TRANSPORT ('auto' uses Twilio when configured)"""
+    name = config['WHATSAPP_TRANSPORT']
+    if name == 'auto':
+        name = 'twilio' if config['TWILIO_ACCOUNT_SID'] and config['TWILIO_AUTH_TOKEN'] else 'log'
+    if name == 'twilio':
+        return TwilioTransport(config['TWILIO_ACCOUNT_SID'], config['TWILIO_AUTH_TOKEN'],
+                               config['TWILIO_WHATSAPP_NUMBER'])
+    if name == 'fake':
+        return FakeTransport()
+    if name == 'log':
+        return LogTransport()
+    raise ValueError(f'Unknown WHATSAPP_TRANSPORT: {name}')
+
+
+def enqueue(phone, body, service='general', delay=0):
+    """Add a message to the outbox in the current transaction; caller commits
+
+    delay holds the message back so others to the same phone can join its digest.
+    """
+    message = WhatsAppMessage(phone=phone, body=body, service=service,
+                              next_attempt_at=datetime.utcnow() + timedelta(seconds=delay))
+    db.session.add(message)
+    return message
+
+
+def claim(message_id, now, due_only):
+    """Atomically take ownership of a message; False if another worker won
+
+    due_only=False also takes messages still waiting out their coalescing window.
+    """
+    outbox = WhatsAppMessage.__table__
+    claimable = (outbox.c.next_attempt_at <= now) & outbox.c.status.in_(['queued', 'sending'])
+    if not due_only:
+        claimable = claimable | (outbox.c.status == 'queued')
+    result = db.session.execute(
+        outbox.update()
+        .where(outbox.c.id == message_id, claimable)
+        .values(status='sending', next_attempt_at=now + CLAIM_TIMEOUT)
+    )
+    return result.rowcount == 1
+
+
+def digest_body(messages):
+    """Combine several messages to one recipient into a single WhatsApp body"""
+    if len(messages) == 1:
+        return messages[0].body
+    services = {m.service for m in messages}
+    kind = f'{services.pop()} ' if len(services) == 1 else ''
+    lines = [f'{len(messages)} new {kind}notifications:']
+    for m in messages:
+        body = ' '.join(m.body.split())
+        if len(body) > DIGEST_LINE_LENGTH:
+            body = body[:DIGEST_LINE_LENGTH - 1] + '…'
+        lines.append(f'- {body}')
+    return '\n'.join(lines)
+
+
+def deliver_due(transport, config, batch_size=50):
+    """Send every due message once; returns the number of messages attempted
+
+    With NOTIFICATION_COALESCE_WINDOW set, the first due message for a phone
+    also picks up the other queued messages to that phone, up to
+    NOTIFICATION_DIGEST_MAX, and they go out as one digest.
+    """
+    coalesce = config['NOTIFICATION_COALESCE_WINDOW'] > 0
+    now = datetime.utcnow()
+    due = db.session.query(WhatsAppMessage.id, WhatsAppMessage.phone).filter(
+        WhatsAppMessage.status.in_(['queued', 'sending']),
+        WhatsAppMessage.next_attempt_at <= now
+    ).order_by(WhatsAppMessage.next_attempt_at).limit(batch_size).all()
+
+    attempted = 0
+    handled_phones = set()
+    for message_id, phone in due:
+        if phone in handled_phones:
+            continue
+        if not claim(message_id, now, due_only=True):
+            db.session.commit()
+            continue
+        claimed = [message_id]
+        if coalesce:
+            handled_phones.add(phone)
+            waiting = db.session.query(WhatsAppMessage.id).filter(
+                WhatsAppMessage.phone == phone,
+                WhatsAppMessage.status == 'queued',
+                WhatsAppMessage.id != message_id
+            ).order_by(WhatsAppMessage.created_at).limit(config['NOTIFICATION_DIGEST_MAX'] - 1)
+            claimed += [row.id for row in waiting if claim(row.id, now, due_only=False)]
+        db.session.commit()
+
+        messages = WhatsAppMessage.query.filter(WhatsAppMessage.id.in_(claimed)).order_by(WhatsAppMessage.created_at).all()
+        attempted += len(messages)
+        try:
+            message_sid = transport.send(phone, digest_body(messages))
+        except Exception as e:
+            for message in messages:
+                message.attempts = (message.attempts or 0) + 1
+                message.last_error = str(e)
+                if message.attempts >= config['NOTIFICATION_MAX_ATTEMPTS']:
+                    message.status = 'failed'
+                else:
+                    message.status = 'queued'
+                    delay = config['NOTIFICATION_RETRY_BASE'] * 2 ** (message.attempts - 1)
+                    message.next_attempt_at = datetime.utcnow() + timedelta(seconds=delay)
+        else:
+            for message in messages:
+                message.attempts = (message.attempts or 0) + 1
+                message.status = 'sent'
+                message.sent_at = datetime.utcnow()
+                message.message_sid = message_sid
+                message.last_error = None
+        db.session.commit()
+    return attempted
+
+
+class NotificationWorker(threading.Thread):
+    """Background thread draining the outbox for one app"""
+
+    def __init__(self, app, transport):
+        super().__init__(name='whatsapp-worker', daemon=True)
+        self.app = app
+        self.transport = transport
+        self.wakeup = threading.Event()
+        self.stopping = False
+
+    def notify(self):
+        """Skip the rest of the poll interval (called after enqueueing)"""
+        self.wakeup.set()
+
+    def stop(self):
+        self.stopping = True
+        self.wakeup.set()
+
+    def run(self):
+        config = self.app.config
+        while not self.stopping:
+            with self.app.app_context():
+                try:
+                    deliver_due(self.transport, config)
+                except Exception as e:
+                    print(f"WhatsApp worker error: {e}")
+                finally:
+                    db.session.remove()
+            self.wakeup.wait(config['NOTIFICATION_POLL_INTERVAL'])
+            self.wakeup.clear()
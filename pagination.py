@@ -0,0 +1,62 @@
+"""
+Keyset (cursor) pagination helpers for College Portal list endpoints
+
+Pages are ordered newest first on (created_at, id) and the cursor encodes the
+last row's key, so fetching page N costs the same as fetching page 1.
+"""
+import base64
+import json
+from datetime import datetime
+from flask import request
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+
+
+class InvalidCursor(ValueError):
+    """Raised when a client sends a cursor we did not issue"""
+
+
+def encode_cursor(created_at, row_id):
+    """Encode a (created_at, id) key as an opaque URL-safe token"""
+    raw = json.dumps([created_at.isoformat(), row_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Decode a token produced by encode_cursor()"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        created_at, row_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor('Invalid cursor') from e
+
+
+def page_args():
+    """Read limit and cursor from the query string"""
+    limit = request.args.get('limit', DEFAULT_LIMIT, type=int)
+    limit = min(max(limit, 1), MAX_LIMIT)
+    cursor = request.args.get('cursor')
+    return limit, decode_cursor(cursor) if cursor else None
+
+
+def apply_keyset(query, created_col, id_col, key=None):
+    """Order newest first and skip everything up to and including key"""
+    if key is not None:
+        created_at, row_id = key
+        query = query.filter(
+            (created_col < created_at) |
+            ((created_col == created_at) & (id_col < row_id))
+        )
+    return query.order_by(created_col.desc(), id_col.desc())
+
+
+def split_page(rows, limit):
+    """Trim the look-ahead row and build the cursor for the next page"""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(last.created_at, last.id)
+
@@ -0,0 +1,160 @@
+"""
+Password hashing for College Portal
+
+Hashes are self-describing strings, so the algorithm and cost can be raised
+later without invalidating stored passwords:
+
+    pbkdf2_sha256$<iterations>$<salt>$<hash>
+    scrypt$<n>$<r>$<p>$<salt>$<hash>
+    <64 hex digits>                        legacy unsalted SHA-256
+
+Hashing runs in a small thread pool (hashlib releases the GIL while it works)
+with a cap on queued jobs, so a login storm fails fast with PoolSaturated
+instead of tying up every request thread. A job that does not finish within
+the pool's timeout is reported the same way.
+"""
+import base64
+import hashlib
+import hmac
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+
+class PoolSaturated(Exception):
+    """Too many hashing jobs are already waiting"""
+
+
+def _b64(data):
+    return base64.b64encode(data).decode().rstrip('=')
+
+
+def _unb64(text):
+    return base64.b64decode(text + '=' * (-len(text) % 4))
+
+
+def is_legacy_hash(encoded):
+    return len(encoded) == 64 and '$' not in encoded
+
+
+def verify_legacy(password, encoded):
+    return hmac.compare_digest(hashlib.sha256(password.encode()).hexdigest(), encoded)
+
+
+class PBKDF2Hasher:
+    algorithm = 'pbkdf2_sha256'
+
+    def __init__(self, iterations=260000):
+        self.iterations = iterations
+
+    def _derive(self, password, salt, iterations):
+        return hashlib.pbkdf2_hmac('sha256', password.encode(), salt, iterations)
+
+    def hash(self, password):
+        salt = os.urandom(16)
+        digest = self._derive(password, salt, self.iterations)
+        return f'{self.algorithm}${self.iterations}${_b64(salt)}${_b64(digest)}'
+
+    def verify(self, password, encoded):
+        _, iterations, salt, digest = encoded.split('$')
+        return hmac.compare_digest(self._derive(password, _unb64(salt), int(iterations)), _unb64(digest))
+
+    def needs_rehash(self, encoded):
+        return not encoded.startswith(f'{self.algorithm}${self.iterations}$')
+
+
+class ScryptHasher:
+    algorithm = 'scrypt'
+
+    def __init__(self, n=2 ** 14, r=8, p=1):
+        self.n, self.r, self.p = n, r, p
+
+    def _derive(self, password, salt, n, r, p):
+        return hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p,
+                              maxmem=2 * 128 * n * r + 1024 * 1024, dklen=32)
+
+    def hash(self, password):
+        salt = os.urandom(16)
+        digest = self._derive(password, salt, self.n, self.r, self.p)
+        return f'{self.algorithm}${self.n}${self.r}${self.p}${_b64(salt)}${_b64(digest)}'
+
+    def verify(self, password, encoded):
+        _, n, r, p, salt, digest = encoded.split('$')
+        derived = self._derive(password, _unb64(salt), int(n), int(r), int(p))
+        return hmac.compare_digest(derived, _unb64(digest))
+
+    def needs_rehash(self, encoded):
+        return not encoded.startswith(f'{self.algorithm}${self.n}${self.r}${self.p}$')
+
+
+HASHERS = {
+    PBKDF2Hasher.algorithm: PBKDF2Hasher,
+    ScryptHasher.algorithm: ScryptHasher
+}
+
+
+def make_hasher(config):
+    """Build the configured hasher (PASSWORD_HASHER and its cost settings)"""
+    if config['PASSWORD_HASHER'] == 'scrypt':
+        return ScryptHasher(n=config['PASSWORD_SCRYPT_N'])
+    return PBKDF2Hasher(iterations=config['PASSWORD_PBKDF2_ITERATIONS'])
+
+
+def check_password(hasher, password, encoded):
+    """Verify password against a hash made by any supported scheme"""
+    if is_legacy_hash(encoded):
+        return verify_legacy(password, encoded)
+    algorithm = encoded.split('$', 1)[0]
+    if algorithm not in HASHERS:
+        return False
+    verifier = hasher if algorithm == hasher.algorithm else HASHERS[algorithm]()
+    try:
+        return verifier.verify(password, encoded)
+    except ValueError:
+        return False  # malformed hash
+
+
+def needs_rehash(hasher, encoded):
+    return is_legacy_hash(encoded) or hasher.needs_rehash(encoded)
+
+
+class HasherPool:
+    """Runs hash/verify on a bounded pool of threads"""
+
+    def __init__(self, hasher, workers, max_queued, timeout=30):
+        self.hasher = hasher
+        self.timeout = timeout
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hasher')
+        self.slots = threading.BoundedSemaphore(workers + max_queued)
+        self._dummy_hash = None
+
+    def _run(self, fn, *args):
+        if not self.slots.acquire(blocking=False):
+            raise PoolSaturated('Too many sign-ins in progress, please retry')
+        try:
+            future = self.executor.submit(fn, *args)
+        except BaseException:
+            self.slots.release()
+            raise
+        future.add_done_callback(lambda _: self.slots.release())
+        try:
+            return future.result(self.timeout)
+        except FutureTimeout:
+            future.cancel()  # still queued: give its slot back now
+            raise PoolSaturated('Sign-in is taking too long, please retry') from None
+
+    def hash(self, password):
+        return self._run(self.hasher.hash, password)
+
+    def verify(self, password, encoded):
+        return self._run(check_password, self.hasher, password, encoded)
+
+    def needs_rehash(self, encoded):
+        return needs_rehash(self.hasher, encoded)
+
+    @property
+    def dummy_hash(self):
+        """A hash at the current cost to verify against when no account matches"""
+        if self._dummy_hash is None:
+            self._dummy_hash = self.hasher.hash(_b64(os.urandom(16)))
+        return self._dummy_hash
@@ -0,0 +1,102 @@
+"""
+ORM-free read path for College Portal list endpoints
+
+List views select plain columns with Core instead of hydrating model
+instances, and turn each row into the same dict the model's to_dict() builds
+using a function compiled once per model. Responses are encoded with orjson
+when it is installed, otherwise with the standard json module.
+"""
+import json
+
+from flask import current_app
+from sqlalchemy import select
+
+from models import db, Student
+from pagination import page_args, apply_keyset, split_page
+
+try:
+    import orjson
+except ImportError:  # optional speed-up
+    orjson = None
+
+# Columns every to_dict() leaves out
+EXCLUDED_COLUMNS = ('password', 'updated_at')
+
+
+class RowSerializer:
+    """Columns to select for a model and a compiled row -> dict function"""
+
+    def __init__(self, model):
+        table = model.__table__
+        self.model = model
+        self.columns = [c for c in table.columns if c.key not in EXCLUDED_COLUMNS]
+        self.with_student = model is not Student and 'student_id' in table.c
+        if self.with_student:
+            self.columns.append(Student.name.label('student_name'))
+        self.serialize = self._compile()
+
+    def _compile(self):
+        # Build one dict literal with the datetime formatting inlined and JSON
+        # columns merged in, e.g.
+        #   lambda row: {'id': row[0], **row[4], 'created_at': _iso(row[5]), ...}
+        items = []
+        for index, column in enumerate(self.columns):
+            value = f'row[{index}]'
+            if isinstance(column.type, db.JSON):
+                items.append(f'**{value}')
+                continue
+            if isinstance(column.type, (db.DateTime, db.Date)):
+                value = f'_iso({value})'
+            items.append(f'{column.key!r}: {value}')
+        source = f"lambda row: {{{', '.join(items)}}}"
+        return eval(compile(source, f'<serializer {self.model.__name__}>', 'eval'), {'_iso': _iso})
+
+    def select(self):
+        table = self.model.__table__
+        stmt = select(*self.columns)
+        if self.with_student:
+            stmt = stmt.select_from(table.outerjoin(Student.__table__, table.c.student_id == Student.id))
+        return stmt
+
+
+def _iso(value):
+    return value.isoformat() if value is not None else None
+
+
+_serializers = {}
+
+
+def serializer_for(model):
+    serializer = _serializers.get(model)
+    if serializer is None:
+        serializer = _serializers[model] = RowSerializer(model)
+    return serializer
+
+
+def compile_serializers(models):
+    """Build serializers up front so the first request doesn't pay for it"""
+    for model in models:
+        serializer_for(model)
+
+
+def list_query(model):
+    """Core select of the columns model.to_dict() returns"""
+    return serializer_for(model).select()
+
+
+def paginate_rows(stmt, model):
+    """Fetch one keyset page of a list_query(); returns (dicts, next_cursor)"""
+    table = model.__table__
+    limit, key = page_args()
+    stmt = apply_keyset(stmt, table.c.created_at, table.c.id, key)
+    rows, next_cursor = split_page(db.session.execute(stmt.limit(limit + 1)).all(), limit)
+    serialize = serializer_for(model).serialize
+    return [serialize(row) for row in rows], next_cursor
+
+
+def json_response(payload):
+    if orjson is not None:
+        body = orjson.dumps(payload)
+    else:
+        body = json.dumps(payload, separators=(',', ':'))
+    return current_app.response_class(body, mimetype='application/json')
@@ -0,0 +1,125 @@
+"""
+Order service registry for College Portal
+
+All services store their orders in the shared orders table (models.Order);
+what differs per service - its URL, labels and the fields kept in the order's
+JSON payload - is declared here. Routes, validation, counters, exports and
+the order feed all read this registry, so adding a campus shop means adding
+one entry to SERVICES.
+"""
+from datetime import date, datetime
+
+
+class Field:
+    """A service-specific order field stored in Order.payload
+
+    type is str, int, datetime or date; dates are stored as ISO strings so
+    the payload serializes the same way to_dict() always did.
+    """
+
+    def __init__(self, name, type=str, required=True, default=None):
+        self.name = name
+        self.type = type
+        self.required = required and default is None
+        self.default = default
+
+    def parse(self, value):
+        """Coerce a request value; raises ValueError"""
+        if value is None:
+            if self.required:
+                raise ValueError(f'{self.name} is required')
+            return self.default
+        try:
+            if self.type is datetime:
+                return datetime.fromisoformat(value).isoformat()
+            if self.type is date:
+                return datetime.fromisoformat(value).date().isoformat()
+            if self.type is int and not isinstance(value, bool):
+                return int(value)
+            if self.type is str and isinstance(value, str):
+                return value
+        except (TypeError, ValueError):
+            pass
+        # Lists, objects and the like would reach the payload and exports as reprs
+        raise ValueError(f'{self.name} is invalid')
+
+
+class Service:
+    """One campus service: URL path, display label and payload fields"""
+
+    def __init__(self, name, path, label, fields, item_key='order', server_fields=None,
+                 terminal_statuses=()):
+        self.name = name
+        self.path = path  # /api/<path>
+        self.label = label
+        self.fields = fields
+        self.item_key = item_key  # key of one order in responses
+        self.list_key = f'{item_key}s'
+        # Fields the server sets; clients cannot supply them on create
+        self.server_fields = server_fields or {}
+        # Finished orders in these states may be moved to the archive
+        self.terminal_statuses = tuple(terminal_statuses)
+
+    @property
+    def field_names(self):
+        return [f.name for f in self.fields] + list(self.server_fields)
+
+    @property
+    def submitted_note(self):
+        return f'{self.label} submitted'
+
+    def build_payload(self, data):
+        """Validate request data into an order payload; raises ValueError"""
+        payload = {f.name: f.parse(data.get(f.name)) for f in self.fields}
+        payload.update(self.server_fields)
+        return payload
+
+
+SERVICES = {service.name: service for service in [
+    Service('outing', 'outing-requests', 'Outing request', [
+        Field('outing_date', datetime),
+        Field('return_date', datetime),
+        Field('reason'),
+        Field('details', required=False),
+        Field('emergency_contact'),
+    ], item_key='request', server_fields={'parent_notified': False, 'security_notified': False}),
+    Service('xerox', 'xerox-orders', 'Xerox order', [
+        Field('service_type'),
+        Field('pages', int),
+        Field('delivery_location'),
+        Field('instructions', required=False),
+        Field('contact_number'),
+    ], terminal_statuses=['completed']),
+    Service('mess', 'mess-orders', 'Mess order', [
+        Field('meal_type'),
+        Field('meal_date', date),
+        Field('quantity', int, default=1),
+        Field('special_requests', required=False),
+    ], terminal_statuses=['delivered']),
+    Service('fivestar', 'fivestar-orders', 'Fivestar order', [
+        Field('category'),
+        Field('item'),
+        Field('quantity', int, default=1),
+        Field('delivery_option'),
+        Field('instructions', required=False),
+        Field('contact_number'),
+    ], terminal_statuses=['delivered']),
+    Service('ccd', 'ccd-orders', 'CCD order', [
+        Field('category'),
+        Field('item'),
+        Field('quantity', int, default=1),
+        Field('size'),
+        Field('instructions', required=False),
+        Field('contact_number'),
+    ], terminal_statuses=['delivered']),
+    Service('stationary', 'stationary-orders', 'Stationary order', [
+        Field('category'),
+        Field('item'),
+        Field('quantity', int, default=1),
+        Field('delivery_option'),
+        Field('instructions', required=False),
+        Field('contact_number'),
+    ], terminal_statuses=['completed']),
+]}
+
+SERVICES_BY_PATH = {service.path: service for service in SERVICES.values()}
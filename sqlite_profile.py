@@ -0,0 +1,111 @@
+"""
+SQLite production profile for College Portal
+
+With several gunicorn workers every write competes for SQLite's single
+database lock. When SQLALCHEMY_DATABASE_URI points at a SQLite file this
+module:
+
+    - keeps connections in a small pool instead of reopening the file for
+      every request, so the page cache and memory map survive
+    - sets per-connection pragmas: WAL (readers no longer block the writer),
+      busy_timeout, synchronous=NORMAL, mmap_size and cache_size
+    - optionally (SQLITE_SINGLE_WRITER) serializes write transactions inside
+      the process, so request threads queue on a lock instead of spinning
+      in SQLite's busy handler; busy_timeout still arbitrates between
+      worker processes
+"""
+import threading
+
+from sqlalchemy import event as sa_event
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+
+
+def is_sqlite(uri):
+    return bool(uri) and make_url(uri).get_backend_name() == 'sqlite'
+
+
+def engine_options(config):
+    """SQLALCHEMY_ENGINE_OPTIONS for a SQLite file database"""
+    return {
+        'poolclass': QueuePool,
+        'pool_size': config['SQLITE_POOL_SIZE'],
+        'max_overflow': config['SQLITE_POOL_SIZE'],
+        # Pooled connections move between request threads (one at a time)
+        'connect_args': {'check_same_thread': False, 'timeout': config['SQLITE_BUSY_TIMEOUT'] / 1000}
+    }
+
+
+def install_pragmas(engine, config):
+    pragmas = [
+        'PRAGMA journal_mode=WAL',
+        f"PRAGMA busy_timeout={int(config['SQLITE_BUSY_TIMEOUT'])}",
+        'PRAGMA synchronous=NORMAL',
+        f"PRAGMA mmap_size={int(config['SQLITE_MMAP_SIZE'])}",
+        f"PRAGMA cache_size={int(config['SQLITE_CACHE_SIZE'])}",
+    ]
+
+    @sa_event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+
+class SingleWriter:
+    """Process-wide lock held from a session's first write until it commits
+
+    Sessions can't hand their unit of work to another thread's connection, so
+    instead of a queue feeding one connection, writers queue on this lock:
+    one write transaction per process reaches SQLite at a time.
+    """
+
+    def __init__(self, timeout):
+        self.lock = threading.Lock()
+        self.timeout = timeout
+
+    def acquire(self, session):
+        if session.info.get('single_writer'):
+            return
+        # On timeout carry on unserialized and let busy_timeout decide
+        session.info['single_writer'] = self.lock.acquire(timeout=self.timeout)
+
+    def release(self, session):
+        if session.info.pop('single_writer', False):
+            self.lock.release()
+
+    def install(self, session):
+        @sa_event.listens_for(session, 'before_flush')
+        def before_flush(session, flush_context, instances):
+            self.acquire(session)
+
+        @sa_event.listens_for(session, 'do_orm_execute')
+        def before_execute(state):
+            if state.is_insert or state.is_update or state.is_delete:
+                self.acquire(state.session)
+
+        @sa_event.listens_for(session, 'after_transaction_end')
+        def after_transaction_end(session, transaction):
+            if transaction.parent is None:
+                self.release(session)
+
+
+def configure(app, db):
+    """Apply the profile to app's database if it is a SQLite file
+
+    Call after db.init_app(app) and before the engine is first used; returns
+    True when the profile is active.
+    """
+    app.sqlite_writer = None
+    uri = app.config['SQLALCHEMY_DATABASE_URI']
+    if not app.config['SQLITE_PROFILE'] or not is_sqlite(uri) or make_url(uri).database in (None, '', ':memory:'):
+        return False
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {**engine_options(app.config),
+                                               **app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})}
+    with app.app_context():
+        install_pragmas(db.engine, app.config)
+    if app.config['SQLITE_SINGLE_WRITER']:
+        app.sqlite_writer = SingleWriter(app.config['SQLITE_BUSY_TIMEOUT'] / 1000)
+        app.sqlite_writer.install(db.session)
+    return True
@@ -107,51 +107,118 @@ function updateStatsDisplay(stats) {
     `;
 }
 
+// ==================== LIVE UPDATES ====================
+
+let eventSource = null;
+let liveUpdates = false;
+
+// Refresh stats and the request list whenever one of our orders changes.
+// Each open stream holds a server thread, so only the visible tab of a
+// logged-in user keeps one open.
+function startEventStream() {
+    liveUpdates = true;
+    syncEventStream();
+}
+
+function syncEventStream() {
+    const wanted = liveUpdates && window.EventSource && document.visibilityState === 'visible';
+    if (!wanted) {
+        closeEventStream();
+        return;
+    }
+    if (eventSource) return;
+    
+    eventSource = new EventSource(`${API_BASE}/events`, { withCredentials: true });
+    const refresh = () => {
+        loadDashboardStats();
+        loadRecentRequests();
+    };
+    eventSource.addEventListener('created', refresh);
+    eventSource.addEventListener('status', refresh);
+    eventSource.onerror = () => {
+        // A full server answers 204 and the browser gives up; submits then
+        // refresh the page themselves (refreshAfterSubmit) until the next
+        // time the tab becomes visible
+        if (eventSource && eventSource.readyState === EventSource.CLOSED) {
+            eventSource = null;
+        }
+    };
+}
+
+function closeEventStream() {
+    if (eventSource) {
+        eventSource.close();
+        eventSource = null;
+    }
+}
+
+function stopEventStream() {
+    liveUpdates = false;
+    closeEventStream();
+}
+
+document.addEventListener('visibilitychange', () => {
+    if (document.visibilityState === 'visible' && liveUpdates && !eventSource) {
+        // Catch up on whatever changed while the tab was hidden
+        loadDashboardStats();
+        loadRecentRequests();
+    }
+    syncEventStream();
+});
+
+async function refreshAfterSubmit() {
+    // The event stream triggers the refresh when it is connected
+    if (eventSource && eventSource.readyState === EventSource.OPEN) return;
+    
+    await loadDashboardStats();
+    await loadRecentRequests();
+}
+
 // ==================== REQUEST HANDLING ====================
 
-async function loadRecentRequests() {
+let loadedRequests = [];
+let requestsCursor = null;
+
+// more=true appends the next page of the feed
+async function loadRecentRequests(more = false) {
     const statusList = document.getElementById('status-list');
     if (!statusList) return;
     
-    statusList.innerHTML = '<div class="loading">Loading requests...</div>';
+    if (!more) {
+        loadedRequests = [];
+        requestsCursor = null;
+        statusList.innerHTML = '<div class="loading">Loading requests...</div>';
+    }
     
     try {
-        // Load requests from all services
-        const services = ['outing-requests', 'xerox-orders', 'mess-orders', 'fivestar-orders', 'ccd-orders', 'stationary-orders'];
-        let allRequests = [];
-        
-        for (const service of services) {
-            try {
-                const response = await fetch(`${API_BASE}/${service}?student_id=${currentStudentId}`, {
-                    credentials: 'same-origin'
-                });
-                const data = await response.json();
-                const requests = data.requests || data.orders || [];
-                
-                // Add service type to each request
-                requests.forEach(r => {
-                    r.serviceType = service.replace('-requests', '').replace('-orders', '');
-                });
-                
-                allRequests = allRequests.concat(requests);
-            } catch (e) {
-                console.warn(`Could not load ${service}:`, e);
-            }
+        // Load the merged feed for all services, one page at a time
+        const params = new URLSearchParams({ student_id: currentStudentId });
+        if (currentTab !== 'all') {
+            params.set('service', currentTab);
+        }
+        if (more && requestsCursor) {
+            params.set('cursor', requestsCursor);
         }
         
-        // Sort by date
-        allRequests.sort((a, b) => new Date(b.created_at) - new Date(a.created_at));
+        const response = await fetch(`${API_BASE}/my-orders?${params}`, {
+            credentials: 'same-origin'
+        });
+        const data = await response.json();
+        const page = data.orders || [];
         
-        // Filter by tab
-        if (currentTab !== 'all') {
-            allRequests = allRequests.filter(r => r.serviceType === currentTab);
-        }
+        // Add service type to each request
+        page.forEach(r => {
+            r.serviceType = r.service;
+        });
+        loadedRequests = loadedRequests.concat(page);
+        requestsCursor = data.next_cursor || null;
         
         // Display requests
-        displayRequests(allRequests);
+        displayRequests(loadedRequests, Boolean(requestsCursor));
         
     } catch (error) {
         console.error('Error loading requests:', error);
+        if (more) return;  // keep the pages already shown
         statusList.innerHTML = `
             <div class="empty-state">
                 <div class="empty-state-icon">📋</div>
@@ -161,7 +228,7 @@ async function loadRecentRequests() {
     }
 }
 
-function displayRequests(requests) {
+function displayRequests(requests, hasMore = false) {
     const statusList = document.getElementById('status-list');
     if (!statusList) return;
     
@@ -206,7 +273,9 @@ function displayRequests(requests) {
                 <span class="status-badge ${request.status}">${request.status}</span>
             </div>
         `;
-    }).join('');
+    }).join('') + (hasMore ? `
+        <button type="button" class="btn btn-secondary" onclick="loadRecentRequests(true)">Load more</button>
+    ` : '');
 }
 
 function getRequestDetails(request) {
@@ -305,8 +374,7 @@ async function submitOutingRequest() {
             showToast('Outing request submitted successfully!', 'success');
             closeModal('outingModal');
             form.reset();
-            await loadDashboardStats();
-            await loadRecentRequests();
+            await refreshAfterSubmit();
             
             // Send WhatsApp notification
             sendWhatsAppNotification('outing', result.request);
@@ -359,8 +427,7 @@ async function submitXeroxOrder() {
             showToast('Xerox order submitted successfully!', 'success');
             closeModal('xeroxModal');
             form.reset();
-            await loadDashboardStats();
-            await loadRecentRequests();
+            await refreshAfterSubmit();
             
             sendWhatsAppNotification('xerox', result.order);
         } else {
@@ -411,8 +478,7 @@ async function submitMessOrder() {
             showToast('Mess order submitted successfully!', 'success');
             closeModal('messModal');
             form.reset();
-            await loadDashboardStats();
-            await loadRecentRequests();
+            await refreshAfterSubmit();
             
             sendWhatsAppNotification('mess', result.order);
         } else {
@@ -465,8 +531,7 @@ async function submitFivestarOrder() {
             showToast('Five Star order submitted successfully!', 'success');
             closeModal('fivestarModal');
             form.reset();
-            await loadDashboardStats();
-            await loadRecentRequests();
+            await refreshAfterSubmit();
             
             sendWhatsAppNotification('fivestar', result.order);
         } else {
@@ -519,8 +584,7 @@ async function submitCCDOrder() {
             showToast('CCD order submitted successfully!', 'success');
             closeModal('ccdModal');
             form.reset();
-            await loadDashboardStats();
-            await loadRecentRequests();
+            await refreshAfterSubmit();
             
             sendWhatsAppNotification('ccd', result.order);
         } else {
@@ -573,8 +637,7 @@ async function submitStationaryOrder() {
             showToast('Stationary order submitted successfully!', 'success');
             closeModal('stationaryModal');
             form.reset();
-            await loadDashboardStats();
-            await loadRecentRequests();
+            await refreshAfterSubmit();
             
             sendWhatsAppNotification('stationary', result.order);
         } else {
@@ -738,6 +801,7 @@ function showMainApp() {
     // Initialize the app
     loadDashboardStats();
     loadRecentRequests();
+    startEventStream();
 }
 
 // Show auth screen and hide main app
@@ -1006,6 +1070,7 @@ async function logout() {
         console.error('Logout error:', error);
     }
     
+    stopEventStream();
     currentUser = null;
     isLoggedIn = false;
     showToast('Logged out successfully', 'success');
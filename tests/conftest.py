@@ -0,0 +1,55 @@
+"""
+Shared fixtures for the College Portal tests
+
+The whole run uses one app on a throwaway SQLite database. The settings are
+in place before app.py is imported, so the module-level app uses them too.
+"""
+import itertools
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TMP = tempfile.mkdtemp(prefix='portal-tests-')
+
+os.environ['ARCHIVE_DIR'] = os.path.join(TMP, 'archive')
+os.environ['NOTIFICATION_WORKER'] = 'False'
+os.environ['WARMUP'] = 'False'
+sys.path.insert(0, ROOT)
+
+import config  # noqa: E402
+
+# create_app() uses DevelopmentConfig, whose database is the bundled portal.db
+config.DevelopmentConfig.SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(TMP, 'portal.db')}"
+
+_numbers = itertools.count(1)
+
+
+@pytest.fixture(scope='session')
+def app():
+    from app import app
+    return app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def make_student(app):
+    """Create a student with unique identifiers; returns its primary key"""
+    from models import db, Student
+
+    def make():
+        n = next(_numbers)
+        with app.app_context():
+            student = Student(student_id=f'T{n:05d}', name=f'Test Student {n}', email=f't{n}@example.edu',
+                              phone=f'+9170000{n:05d}', password='x', emergency_contact='+911111111111',
+                              hostel_room='A-101', blood_group='O+')
+            db.session.add(student)
+            db.session.commit()
+            return student.id
+    return make
@@ -0,0 +1,33 @@
+"""
+Archived orders read back through the list and detail endpoints
+"""
+from datetime import datetime, timedelta
+
+from archive import archive_orders
+from models import db, Order, Student
+
+XEROX = {'service_type': 'print', 'pages': 2, 'delivery_location': 'Library', 'contact_number': '+911111111111'}
+
+
+def test_archived_order_shows_current_student_name(app, client, make_student):
+    student_id = make_student()
+    created_at = datetime.now() - timedelta(days=200)
+    with app.app_context():
+        old = Order(service='xerox', student_id=student_id, status='completed',
+                    created_at=created_at, payload=dict(XEROX))
+        db.session.add(old)
+        db.session.add(Order(service='xerox', student_id=student_id, payload=dict(XEROX)))  # stays hot
+        db.session.commit()
+        order_id = old.id
+
+        assert archive_orders(app.order_archive, datetime.now() - timedelta(days=90)) >= 1
+        db.session.get(Student, student_id).name = 'Renamed Student'
+        db.session.commit()
+
+    detail = client.get(f'/api/xerox-orders/{order_id}').get_json()
+    day = created_at.date().isoformat()
+    listed = client.get(f'/api/xerox-orders?student_id={student_id}&from={day}&to={day}').get_json()
+
+    assert [order['id'] for order in listed['orders']] == [order_id]
+    assert detail['student_name'] == listed['orders'][0]['student_name'] == 'Renamed Student'
+    assert 'history' not in detail
@@ -0,0 +1,53 @@
+"""
+Buffered status history: rows reach request_statuses on graceful shutdown
+"""
+import pytest
+
+from audit import AuditLog, status_row
+from models import db, RequestStatus
+
+ROWS = 250
+
+
+@pytest.fixture
+def buffered_log(app):
+    # Nothing is flushed on a timer or batch size during the test
+    log = AuditLog(app, 'buffered', batch_size=10 ** 6, flush_interval=3600)
+    log.start()
+    yield log
+    log.stop()
+
+
+def count_rows(app, request_type):
+    with app.app_context():
+        return RequestStatus.query.filter_by(request_type=request_type).count()
+
+
+def test_no_rows_lost_on_graceful_stop(app, buffered_log):
+    with app.app_context():
+        for order_id in range(ROWS):
+            buffered_log.record(status_row('audit-stop', order_id, 'pending'))
+            db.session.commit()
+    assert count_rows(app, 'audit-stop') == 0  # still buffered
+
+    buffered_log.stop()
+
+    assert count_rows(app, 'audit-stop') == ROWS
+
+
+def test_rolled_back_rows_are_dropped(app, buffered_log):
+    with app.app_context():
+        buffered_log.record(status_row('audit-rollback', 1, 'pending'))
+        # Releasing a savepoint is not the transaction committing
+        with db.session.begin_nested():
+            pass
+        db.session.rollback()
+
+        buffered_log.record(status_row('audit-rollback', 2, 'pending'))
+        db.session.commit()
+
+    buffered_log.stop()
+
+    with app.app_context():
+        kept = [row.request_id for row in RequestStatus.query.filter_by(request_type='audit-rollback')]
+    assert kept == [2]
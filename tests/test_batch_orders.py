@@ -0,0 +1,33 @@
+"""
+POST /api/orders/batch: body shapes and per-item errors
+"""
+XEROX = {'service': 'xerox', 'service_type': 'print', 'pages': 2, 'delivery_location': 'Library',
+         'contact_number': '+911111111111'}
+
+
+def test_bare_array_is_accepted(client, make_student):
+    student_id = make_student()
+
+    response = client.post('/api/orders/batch', json=[dict(XEROX, student_id=student_id)] * 2)
+
+    assert response.status_code == 201
+    assert response.get_json()['created'] == 2
+
+
+def test_other_bodies_are_rejected(client):
+    for body in ['orders', 7, {'orders': {}}, []]:
+        assert client.post('/api/orders/batch', json=body).status_code == 400
+
+
+def test_non_string_service_is_a_per_item_error(client, make_student):
+    student_id = make_student()
+
+    response = client.post('/api/orders/batch', json={'orders': [
+        dict(XEROX, student_id=student_id),
+        dict(XEROX, student_id=student_id, service=['xerox'])
+    ]})
+
+    results = response.get_json()['results']
+    assert response.status_code == 201
+    assert 'id' in results[0]
+    assert results[1] == {'index': 1, 'error': 'Unknown service'}
@@ -0,0 +1,18 @@
+"""
+The shared SQLite cache is never shared between databases
+"""
+from cache import make_cache
+
+
+def sqlite_cache(uri):
+    config = {'CACHE_BACKEND': 'sqlite', 'CACHE_SQLITE_PATH': '', 'SQLALCHEMY_DATABASE_URI': uri}
+    return make_cache(config, 'student_profiles', maxsize=16, ttl=60)
+
+
+def test_default_path_follows_the_database(tmp_path):
+    first = sqlite_cache(f'sqlite:///{tmp_path}/first.db')
+    second = sqlite_cache(f'sqlite:///{tmp_path}/second.db')
+    first.set(1, {'name': 'First'})
+
+    assert second.get(1) is None
+    assert sqlite_cache(f'sqlite:///{tmp_path}/first.db').get(1) == {'name': 'First'}
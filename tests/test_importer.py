@@ -0,0 +1,47 @@
+"""
+Bulk import: bad or conflicting rows are reported, not a 500
+"""
+import io
+
+from importer import StudentImporter
+from models import db, Student
+from passwords import PBKDF2Hasher
+
+
+def student_row(n):
+    return {'student_id': f'IMP{n:04d}', 'name': f'Imported {n}', 'email': f'imp{n}@example.edu',
+            'phone': f'+9180000{n:05d}', 'password': 'secret', 'emergency_contact': '+911111111111',
+            'hostel_room': 'B-202', 'blood_group': 'A+'}
+
+
+def test_row_registered_during_import_is_reported(app):
+    def rows():
+        for n in range(1, 6):
+            if n == 3:
+                # Someone signs up with this student ID after the import started
+                db.session.add(Student(**dict(student_row(3), email='other@example.edu', phone='+919999999999')))
+                db.session.commit()
+            yield n, student_row(n)
+
+    with app.app_context():
+        importer = StudentImporter(PBKDF2Hasher(iterations=1000), batch_size=10, processes=2)
+        report = importer.run(rows())
+        imported = Student.query.filter(Student.student_id.like('IMP%')).count()
+
+    assert (report['imported'], report['failed']) == (4, 1)
+    assert report['errors'][0]['line'] == 3
+    assert imported == 5  # four imported plus the one that signed up
+
+
+def test_invalid_utf8_rows_are_reported(client):
+    header = ','.join(student_row(0)).encode()
+    lines = [header] + [','.join(student_row(n).values()).encode() for n in (11, 12, 13)]
+    lines[2] = lines[2].replace(b'Imported', b'Imp\xffrted')
+    upload = (io.BytesIO(b'\n'.join(lines) + b'\n'), 'students.csv')
+
+    response = client.post('/api/students/import', data={'file': upload})
+
+    report = response.get_json()
+    assert response.status_code == 201
+    assert (report['imported'], report['failed']) == (2, 1)
+    assert report['errors'] == [{'line': 3, 'error': 'Malformed row'}]
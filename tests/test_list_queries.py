@@ -0,0 +1,58 @@
+"""
+List endpoints issue a fixed number of queries however many orders they return
+"""
+from sqlalchemy import event
+
+from models import db, Order
+
+XEROX = {'service_type': 'print', 'pages': 2, 'delivery_location': 'Library', 'contact_number': '+911111111111'}
+
+
+def add_orders(app, student_id, service, payload, count):
+    with app.app_context():
+        db.session.add_all([Order(service=service, student_id=student_id, payload=dict(payload))
+                            for _ in range(count)])
+        db.session.commit()
+
+
+def count_queries(app, client, url):
+    """Run one GET and return (response json, number of SQL statements)"""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        response = client.get(url)
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+    assert response.status_code == 200
+    return response.get_json(), len(statements)
+
+
+def test_my_orders_query_count_is_constant(app, client, make_student):
+    few, many = make_student(), make_student()
+    add_orders(app, few, 'xerox', XEROX, 2)
+    add_orders(app, many, 'xerox', XEROX, 30)
+
+    small, small_queries = count_queries(app, client, f'/api/my-orders?student_id={few}')
+    large, large_queries = count_queries(app, client, f'/api/my-orders?student_id={many}')
+
+    assert (len(small['orders']), len(large['orders'])) == (2, 30)
+    assert small_queries == large_queries
+
+
+def test_service_list_query_count_is_constant(app, client, make_student):
+    student = make_student()
+    add_orders(app, student, 'xerox', XEROX, 3)
+    add_orders(app, student, 'xerox', XEROX, 40)
+
+    small, small_queries = count_queries(app, client, f'/api/xerox-orders?student_id={student}&limit=3')
+    large, large_queries = count_queries(app, client, f'/api/xerox-orders?student_id={student}&limit=40')
+
+    assert (len(small['orders']), len(large['orders'])) == (3, 40)
+    assert all(order['student_name'] for order in large['orders'])
+    assert small_queries == large_queries
@@ -0,0 +1,62 @@
+"""
+Migrating a database that still has the per-service order tables
+"""
+import os
+from datetime import datetime
+
+from sqlalchemy import create_engine
+
+import config
+from models import db, Student
+
+LEGACY_XEROX = db.Table(
+    'xerox_orders', db.MetaData(),
+    db.Column('id', db.Integer, primary_key=True),
+    db.Column('student_id', db.Integer, nullable=False),
+    db.Column('service_type', db.String(50), nullable=False),
+    db.Column('pages', db.Integer, nullable=False),
+    db.Column('delivery_location', db.String(50), nullable=False),
+    db.Column('instructions', db.Text),
+    db.Column('contact_number', db.String(20), nullable=False),
+    db.Column('status', db.String(20)),
+    db.Column('created_at', db.DateTime),
+    db.Column('updated_at', db.DateTime)
+)
+
+
+def make_legacy_database(uri):
+    engine = create_engine(uri)
+    Student.__table__.create(engine)
+    LEGACY_XEROX.create(engine)
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.execute(Student.__table__.insert().values(
+            id=1, student_id='L00001', name='Legacy Student', email='legacy@example.edu',
+            phone='+919000000001', password='x', emergency_contact='+911111111111',
+            hostel_room='C-303', blood_group='B+', created_at=now))
+        conn.execute(LEGACY_XEROX.insert(), [
+            {'id': n, 'student_id': 1, 'service_type': 'print', 'pages': n, 'delivery_location': 'Library',
+             'contact_number': '+911111111111', 'status': 'pending', 'created_at': now, 'updated_at': now}
+            for n in range(1, 4)])
+    engine.dispose()
+
+
+def test_orders_can_be_created_after_consolidation(tmp_path, monkeypatch):
+    from app import create_app
+
+    uri = f"sqlite:///{os.path.join(tmp_path, 'legacy.db')}"
+    make_legacy_database(uri)
+    monkeypatch.setattr(config.DevelopmentConfig, 'SQLALCHEMY_DATABASE_URI', uri)
+    legacy_app = create_app()  # migrates on startup
+    client = legacy_app.test_client()
+
+    migrated = client.get('/api/xerox-orders?student_id=1').get_json()['orders']
+    response = client.post('/api/xerox-orders', json={
+        'student_id': 1, 'service_type': 'print', 'pages': 9,
+        'delivery_location': 'Library', 'contact_number': '+911111111111'})
+
+    assert sorted(order['pages'] for order in migrated) == [1, 2, 3]
+    assert response.status_code == 201
+    assert response.get_json()['order']['id'] not in {order['id'] for order in migrated}
+    with legacy_app.app_context():
+        db.engine.dispose()
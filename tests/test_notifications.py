@@ -0,0 +1,101 @@
+"""
+WhatsApp outbox: claiming, retry with backoff, failure and per-phone digests
+"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from models import db, WhatsAppMessage
+from notifications import FakeTransport, claim, deliver_due, enqueue
+
+CONFIG = {
+    'NOTIFICATION_MAX_ATTEMPTS': 3,
+    'NOTIFICATION_RETRY_BASE': 10,
+    'NOTIFICATION_COALESCE_WINDOW': 0,
+    'NOTIFICATION_DIGEST_MAX': 3
+}
+
+
+@pytest.fixture
+def outbox(app):
+    """An app context with an empty outbox"""
+    with app.app_context():
+        WhatsAppMessage.query.delete()
+        db.session.commit()
+        yield
+        db.session.rollback()
+
+
+def make_due(*messages):
+    for message in messages:
+        message.next_attempt_at = datetime.utcnow() - timedelta(seconds=1)
+    db.session.commit()
+
+
+def test_failed_sends_are_retried_with_backoff(outbox):
+    transport = FakeTransport(fail_times=2)
+    message = enqueue('+919000000001', 'Order ready', 'xerox')
+    db.session.commit()
+
+    delays = []
+    for _ in range(2):
+        started = datetime.utcnow()
+        assert deliver_due(transport, CONFIG) == 1
+        assert (message.status, message.last_error) == ('queued', 'Simulated delivery failure')
+        delays.append(round((message.next_attempt_at - started).total_seconds()))
+        assert deliver_due(transport, CONFIG) == 0  # not due again yet
+        make_due(message)
+    assert deliver_due(transport, CONFIG) == 1
+
+    assert delays == [10, 20]
+    assert (message.status, message.attempts, message.message_sid) == ('sent', 3, 'FAKE000001')
+    assert message.last_error is None
+    assert transport.sent == [('+919000000001', 'Order ready')]
+
+
+def test_message_fails_after_max_attempts(outbox):
+    transport = FakeTransport(fail_times=CONFIG['NOTIFICATION_MAX_ATTEMPTS'])
+    message = enqueue('+919000000002', 'Order ready')
+    db.session.commit()
+
+    for _ in range(CONFIG['NOTIFICATION_MAX_ATTEMPTS']):
+        deliver_due(transport, CONFIG)
+        make_due(message)
+    assert deliver_due(transport, CONFIG) == 0
+
+    assert (message.status, message.attempts) == ('failed', CONFIG['NOTIFICATION_MAX_ATTEMPTS'])
+    assert transport.sent == []
+
+
+def test_claimed_message_is_skipped_until_its_claim_expires(outbox):
+    transport = FakeTransport()
+    message = enqueue('+919000000003', 'Order ready')
+    db.session.commit()
+
+    now = datetime.utcnow()
+    assert claim(message.id, now, due_only=True)  # another worker is sending it
+    assert not claim(message.id, now, due_only=True)
+    db.session.commit()
+    assert deliver_due(transport, CONFIG) == 0
+
+    make_due(message)  # that worker died mid-send
+    assert deliver_due(transport, CONFIG) == 1
+    assert message.status == 'sent'
+
+
+def test_queued_messages_go_out_as_one_digest_per_phone(outbox):
+    transport = FakeTransport()
+    config = dict(CONFIG, NOTIFICATION_COALESCE_WINDOW=30)
+    first = enqueue('+919000000004', 'Xerox order #1 ready', 'xerox')
+    held = [enqueue('+919000000004', f'Xerox order #{n} ready', 'xerox', delay=30) for n in (2, 3, 4)]
+    other = enqueue('+919000000005', 'CCD order ready', 'ccd')
+    db.session.commit()
+    make_due(first, other)
+
+    assert deliver_due(transport, config) == 4
+
+    sent = dict(transport.sent)
+    assert sent['+919000000004'] == ('3 new xerox notifications:\n'
+                                     '- Xerox order #1 ready\n- Xerox order #2 ready\n- Xerox order #3 ready')
+    assert sent['+919000000005'] == 'CCD order ready'
+    assert [m.status for m in [first, *held, other]] == ['sent', 'sent', 'sent', 'queued', 'sent']
@@ -0,0 +1,51 @@
+"""
+Sign-in hashing: unknown logins cost a verify, slow jobs fail fast
+"""
+import threading
+
+import pytest
+
+from passwords import HasherPool, PBKDF2Hasher, PoolSaturated
+
+
+class SlowHasher(PBKDF2Hasher):
+    def __init__(self, release):
+        super().__init__(iterations=1000)
+        self.release = release
+
+    def hash(self, password):
+        self.release.wait()
+        return super().hash(password)
+
+
+def test_timeout_is_reported_as_saturation():
+    release = threading.Event()
+    pool = HasherPool(SlowHasher(release), workers=1, max_queued=1, timeout=0.05)
+    try:
+        with pytest.raises(PoolSaturated):
+            pool.hash('secret')
+        with pytest.raises(PoolSaturated):
+            pool.hash('secret')  # queued behind the first job, cancelled on timeout
+    finally:
+        release.set()
+    assert pool.slots.acquire(timeout=1)  # the slots come back
+
+
+def test_unknown_login_verifies_against_dummy_hash(app, client, monkeypatch):
+    checked = []
+    verify = app.password_pool.verify
+    monkeypatch.setattr(app.password_pool, 'verify',
+                        lambda password, encoded: checked.append(encoded) or verify(password, encoded))
+
+    response = client.post('/api/login', json={'login_id': 'NOBODY-1', 'password': 'secret'})
+
+    assert response.status_code == 401
+    assert checked == [app.password_pool.dummy_hash]
+    assert not app.password_pool.needs_rehash(app.password_pool.dummy_hash)
+
+
+
+def test_non_string_login_id_is_rejected(client):
+    response = client.post('/api/login', json={'login_id': 12345, 'password': 'secret'})
+
+    assert response.status_code == 400
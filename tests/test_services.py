@@ -0,0 +1,28 @@
+"""
+Order fields accept only values of their declared type
+"""
+import pytest
+
+from services import SERVICES
+
+XEROX = {'service_type': 'print', 'pages': 2, 'delivery_location': 'Library', 'contact_number': '+911111111111'}
+
+
+@pytest.mark.parametrize('field, value', [
+    ('service_type', {'a': 1}),
+    ('delivery_location', ['Library']),
+    ('contact_number', 911111111111),
+    ('pages', True),
+    ('pages', 'two'),
+])
+def test_wrong_types_are_rejected(field, value):
+    with pytest.raises(ValueError, match=f'{field} is invalid'):
+        SERVICES['xerox'].build_payload(dict(XEROX, **{field: value}))
+
+
+def test_valid_values_are_kept():
+    payload = SERVICES['xerox'].build_payload(dict(XEROX, pages='3'))
+
+    assert payload['pages'] == 3
+    assert payload['service_type'] == 'print'
+    assert payload['instructions'] is None
@@ -0,0 +1,38 @@
+"""
+In-memory token-bucket rate limiting for College Portal
+
+Used by the login view to reject bursts per identifier and per client IP
+before they cost a database lookup or a password hash. State is per worker
+process, which is enough to blunt credential stuffing without shared storage.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class RateLimiter:
+    """Token buckets keyed by string, holding at most max_keys buckets"""
+
+    def __init__(self, burst, per_minute, max_keys=10000):
+        self.burst = burst
+        self.rate = per_minute / 60.0
+        self.max_keys = max_keys
+        self.buckets = OrderedDict()  # key -> (tokens, last refill time)
+        self.lock = threading.Lock()
+
+    def allow(self, key):
+        """Take one token for key; returns 0 if allowed, else seconds to wait"""
+        now = time.monotonic()
+        with self.lock:
+            tokens, updated = self.buckets.pop(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0
+            else:
+                wait = (1 - tokens) / self.rate if self.rate else float('inf')
+            self.buckets[key] = (tokens, now)
+            # Least recently seen keys go first; a full bucket is the default anyway
+            while len(self.buckets) > self.max_keys:
+                self.buckets.popitem(last=False)
+        return wait
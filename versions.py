@@ -0,0 +1,73 @@
+"""
+Version stamps and conditional GET for College Portal list endpoints
+
+Every view that changes what a list shows bumps the version of the affected
+scopes in its own transaction:
+
+    students         any student created or renamed (names appear in order lists)
+    student:<id>     that student's profile or any of their orders changed
+    service:<name>   any order of that service created or changed
+
+List ETags hash the request path with the versions of its scopes, so a
+matching If-None-Match is answered with 304 after a primary-key read, without
+touching the order tables.
+"""
+import hashlib
+import json
+from functools import wraps
+
+from flask import request, make_response
+
+from counters import upsert_increment
+from models import db, VersionStamp
+
+stamps = VersionStamp.__table__
+
+
+def bump_versions(*scopes):
+    """Increment each scope's version within the current session transaction"""
+    for scope in scopes:
+        upsert_increment(stamps, {'scope': scope}, 'version', 1)
+
+
+def order_changed(service, order):
+    bump_versions(f'student:{order.student_id}', f'service:{service}')
+
+
+def list_etag(scopes):
+    """Strong ETag for the current request given the versions of its scopes"""
+    rows = db.session.execute(
+        db.select(stamps.c.scope, stamps.c.version).where(stamps.c.scope.in_(scopes))
+    )
+    versions = dict.fromkeys(scopes, 0)
+    versions.update({row.scope: row.version for row in rows})
+    key = json.dumps([request.full_path, sorted(versions.items())])
+    return hashlib.sha1(key.encode()).hexdigest()[:24]
+
+
+def order_list_scopes(service):
+    """Scopes for a service's order list, optionally filtered by ?student_id="""
+    student_id = request.args.get('student_id', type=int)
+    if student_id:
+        return [f'student:{student_id}']
+    return [f'service:{service}', 'students']
+
+
+def conditional(scopes):
+    """Answer If-None-Match with 304 when none of scopes() changed"""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            etag = list_etag(scopes())
+            if request.if_none_match.contains(etag):
+                response = make_response('', 304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            # Cache the body but revalidate on every use
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        return wrapper
+    return decorator